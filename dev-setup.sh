@@ -53,7 +53,7 @@ source venv/bin/activate
 echo ""
 echo "📥 Installing Python dependencies..."
 pip install --upgrade pip -q
-pip install -r requirements.txt -q
+pip install -r requirements.txt -q --no-input --disable-pip-version-check
 echo -e "${GREEN}✅ Dependencies installed${NC}"
 
 # Check if Ollama model is downloaded
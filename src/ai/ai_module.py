@@ -7,16 +7,20 @@ using the Groq API.
 
 import os
 import json
+import heapq
 import requests
-from typing import Dict, List, Optional, Any
+from requests.adapters import HTTPAdapter
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Any
 from dataclasses import dataclass
-import pandas as pd
+from array import array
+import numpy as np
 from scapy.packet import Packet
 from scapy.layers.inet import IP, TCP, UDP, ICMP
 from scapy.layers.l2 import Ether
+from src.utils.helpers import packet_length
 import logging
 from dotenv import load_dotenv
-import asyncio
 
 # Load environment variables
 load_dotenv()
@@ -27,13 +31,26 @@ logger = logging.getLogger(__name__)
 
 # Import multi-agent system
 try:
-    from src.ai.multi_agent_ai import multi_agent, query_ai_async, get_active_providers, get_suggested_queries
+    from src.ai.multi_agent_ai import multi_agent, query_ai_async, run_sync, get_active_providers, get_suggested_queries
     USE_MULTI_AGENT = True
     logger.info("Multi-agent AI system loaded successfully")
 except ImportError as e:
     logger.warning(f"Multi-agent system not available: {e}")
     USE_MULTI_AGENT = False
 
+# Well-known service ports that are common attack targets
+SUSPICIOUS_PORTS = frozenset({22, 23, 3389, 445, 135, 139, 1433, 1521, 3306, 5432})
+
+# Destination ports used by backdoors/IRC bots or invalid on the wire
+BAD_PORTS = frozenset({0, 65535, 31337, 6667})
+
+# IP protocol numbers with a friendly name in the protocol distribution
+IP_PROTOCOL_NAMES = {6: "TCP", 17: "UDP", 1: "ICMP"}
+
+# Shared keep-alive session so the key test and later queries reuse one TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 @dataclass
 class PacketSummary:
     """Data class for packet summary statistics"""
@@ -44,7 +61,7 @@ class PacketSummary:
     top_src_ips: Dict[str, int]
     top_dst_ips: Dict[str, int]
     port_analysis: Dict[str, List[int]]
-    packet_sizes: List[int]
+    packet_sizes: np.ndarray  # int32 array, one entry per packet
     time_range: tuple
     suspicious_patterns: List[str]
 
@@ -59,11 +76,12 @@ class AIQueryEngine:
         Safer: Only applies rules to packets WITH an IP layer (others are just ignored or marked explicitly).
         """
         suspicious = []
-        syn_counts = {}
+        syn_counts = Counter()
         for pkt in packets:
             is_suspicious = False
             # Skip packets with no IP layer (broadcasts, ARP, etc.) - but optionally you could flag them.
-            if IP not in pkt:
+            ip_layer = pkt.getlayer(IP)
+            if ip_layer is None:
                 continue
             # Malformed packet (catch scapy error or missing layers)
             try:
@@ -72,16 +90,18 @@ class AIQueryEngine:
             except Exception:
                 is_suspicious = True
             # SYN rate (potential scan)
-            if TCP in pkt:
-                if pkt[TCP].flags & 0x02:  # SYN flag
-                    syn_counts[pkt[IP].src] = syn_counts.get(pkt[IP].src, 0) + 1
-                    if syn_counts[pkt[IP].src] > 10:
+            tcp_layer = pkt.getlayer(TCP)
+            if tcp_layer is not None:
+                if tcp_layer.flags & 0x02:  # SYN flag
+                    src_ip = ip_layer.src
+                    syn_counts[src_ip] += 1
+                    if syn_counts[src_ip] > 10:
                         is_suspicious = True
-            # Bad/odd port usage
-            bad_ports = {0, 65535, 31337, 6667}
-            if TCP in pkt and pkt[TCP].dport in bad_ports:
-                is_suspicious = True
-            if UDP in pkt and pkt[UDP].dport in bad_ports:
+                # Bad/odd port usage
+                if tcp_layer.dport in BAD_PORTS:
+                    is_suspicious = True
+            udp_layer = pkt.getlayer(UDP)
+            if udp_layer is not None and udp_layer.dport in BAD_PORTS:
                 is_suspicious = True
             # Weird protocols - could add more rules here
             # (e.g., very rare protocols)
@@ -97,11 +117,10 @@ class AIQueryEngine:
         """
         clusters = {}
         for pkt in suspicious_packets:
-            if IP not in pkt:
+            ip_layer = pkt.getlayer(IP)
+            if ip_layer is None:
                 continue    # Defensive, should not happen
-            src = pkt[IP].src
-            dst = pkt[IP].dst
-            key = (src, dst)
+            key = (ip_layer.src, ip_layer.dst)
             if key not in clusters:
                 clusters[key] = []
             clusters[key].append(pkt)
@@ -159,9 +178,16 @@ class AIQueryEngine:
         if not self.api_key:
             return False
         
+        # The multi-agent system already tested this key alongside the other
+        # providers on one event loop; reuse its verdict instead of a second round trip
+        if USE_MULTI_AGENT:
+            for provider in multi_agent.providers:
+                if provider.name == "Groq" and provider.api_key == self.api_key:
+                    return provider in multi_agent.active_providers
+        
         try:
             # Groq uses the OpenAI-compatible models endpoint for key validation
-            response = requests.get(
+            response = _SESSION.get(
                 "https://api.groq.com/openai/v1/models",
                 headers=self.headers,
                 timeout=10
@@ -172,92 +198,85 @@ class AIQueryEngine:
             return False
     
     
-    def extract_packet_statistics(self, packets: List[Packet]) -> PacketSummary:
+    def extract_packet_statistics(self, packets: Iterable[Packet]) -> PacketSummary:
         """
-        Extract comprehensive statistics from packet list for AI analysis
+        Extract comprehensive statistics from packets for AI analysis.
+        Works in a single pass, so any iterable (e.g. a PcapReader stream) is accepted.
         """
-        if not packets:
-            return PacketSummary(0, [], [], {}, {}, {}, {}, [], (0, 0), [])
-        
         # Basic statistics
-        total_packets = len(packets)
-        src_ips = []
-        dst_ips = []
-        protocols = {}
-        src_ip_counts = {}
-        dst_ip_counts = {}
+        total_packets = 0
+        protocols = Counter()
+        src_ip_counts = Counter()
+        dst_ip_counts = Counter()
         port_analysis = {"tcp": [], "udp": []}
-        packet_sizes = []
-        timestamps = []
+        packet_sizes = array('i')  # compact int32 buffer, handed to NumPy without a copy
+        min_time = None
+        max_time = None
         suspicious_patterns = []
         
         for pkt in packets:
+            total_packets += 1
+            
             # Packet size
-            packet_sizes.append(len(pkt))
+            packet_sizes.append(packet_length(pkt))
             
             # Timestamp
             if hasattr(pkt, 'time'):
-                timestamps.append(float(pkt.time))
+                ts = float(pkt.time)
+                if min_time is None or ts < min_time:
+                    min_time = ts
+                if max_time is None or ts > max_time:
+                    max_time = ts
             
-            # IP layer analysis
-            if IP in pkt:
-                ip_layer = pkt[IP]
+            # IP layer analysis (each layer is looked up once per packet)
+            ip_layer = pkt.getlayer(IP)
+            if ip_layer is not None:
                 src_ip = ip_layer.src
                 dst_ip = ip_layer.dst
                 
-                src_ips.append(src_ip)
-                dst_ips.append(dst_ip)
-                
                 # Count IPs
-                src_ip_counts[src_ip] = src_ip_counts.get(src_ip, 0) + 1
-                dst_ip_counts[dst_ip] = dst_ip_counts.get(dst_ip, 0) + 1
+                src_ip_counts[src_ip] += 1
+                dst_ip_counts[dst_ip] += 1
                 
                 # Protocol analysis
                 proto_num = ip_layer.proto
-                if proto_num == 6:
-                    protocol = "TCP"
-                elif proto_num == 17:
-                    protocol = "UDP"
-                elif proto_num == 1:
-                    protocol = "ICMP"
-                else:
-                    protocol = f"Protocol_{proto_num}"
-                
-                protocols[protocol] = protocols.get(protocol, 0) + 1
+                protocols[IP_PROTOCOL_NAMES.get(proto_num) or f"Protocol_{proto_num}"] += 1
                 
                 # Port analysis
-                if TCP in pkt:
-                    port_analysis["tcp"].append(pkt[TCP].dport)
-                elif UDP in pkt:
-                    port_analysis["udp"].append(pkt[UDP].dport)
+                tcp_layer = pkt.getlayer(TCP)
+                if tcp_layer is not None:
+                    port_analysis["tcp"].append(tcp_layer.dport)
+                else:
+                    udp_layer = pkt.getlayer(UDP)
+                    if udp_layer is not None:
+                        port_analysis["udp"].append(udp_layer.dport)
                 
                 # Suspicious pattern detection
-                if self._detect_suspicious_pattern(pkt):
+                if self._is_suspicious(tcp_layer, ICMP in pkt):
                     suspicious_patterns.append(f"Suspicious activity from {src_ip} to {dst_ip}")
             
             elif Ether in pkt:
-                protocols["Ethernet"] = protocols.get("Ethernet", 0) + 1
+                protocols["Ethernet"] += 1
         
-        # Get unique IPs
-        unique_src_ips = list(set(src_ips))
-        unique_dst_ips = list(set(dst_ips))
+        if total_packets == 0:
+            return PacketSummary(0, [], [], {}, {}, {}, {}, np.empty(0, dtype=np.int32), (0, 0), [])
         
         # Sort top IPs
-        top_src_ips = dict(sorted(src_ip_counts.items(), key=lambda x: x[1], reverse=True)[:10])
-        top_dst_ips = dict(sorted(dst_ip_counts.items(), key=lambda x: x[1], reverse=True)[:10])
+        top_src_ips = dict(src_ip_counts.most_common(10))
+        top_dst_ips = dict(dst_ip_counts.most_common(10))
         
         # Time range
-        time_range = (min(timestamps) if timestamps else 0, max(timestamps) if timestamps else 0)
+        time_range = (min_time or 0, max_time or 0)
         
         return PacketSummary(
             total_packets=total_packets,
-            unique_src_ips=unique_src_ips,
-            unique_dst_ips=unique_dst_ips,
-            protocol_distribution=protocols,
+            unique_src_ips=list(src_ip_counts),
+            unique_dst_ips=list(dst_ip_counts),
+            protocol_distribution=dict(protocols),
             top_src_ips=top_src_ips,
             top_dst_ips=top_dst_ips,
             port_analysis=port_analysis,
-            packet_sizes=packet_sizes,
+            packet_sizes=np.frombuffer(packet_sizes, dtype=np.int32),
             time_range=time_range,
             suspicious_patterns=suspicious_patterns
         )
@@ -268,27 +287,35 @@ class AIQueryEngine:
         """
         if IP not in pkt:
             return False
-        
-        # Check for common suspicious ports
-        suspicious_ports = {22, 23, 3389, 445, 135, 139, 1433, 1521, 3306, 5432}
-        
-        if TCP in pkt:
-            if pkt[TCP].dport in suspicious_ports:
+        return self._is_suspicious(pkt.getlayer(TCP), ICMP in pkt)
+    
+    @staticmethod
+    def _is_suspicious(tcp_layer, has_icmp: bool) -> bool:
+        """
+        Suspicious-pattern check on already resolved layers
+        """
+        if tcp_layer is not None:
+            # Check for common suspicious ports
+            if tcp_layer.dport in SUSPICIOUS_PORTS:
                 return True
             # Check for port scanning patterns
-            if pkt[TCP].flags & 0x02:  # SYN flag
+            if tcp_layer.flags & 0x02:  # SYN flag
                 return True
         
         # Check for ICMP (ping sweeps)
-        if ICMP in pkt:
-            return True
-        
-        return False
+        return has_icmp
     
     def format_data_for_ai(self, packet_summary: PacketSummary) -> str:
         """
         Format packet data into a readable string for AI analysis
         """
+        sizes = np.asarray(packet_summary.packet_sizes)
+        if sizes.size:
+            size_avg, size_min, size_max = float(sizes.mean()), int(sizes.min()), int(sizes.max())
+            size_median, size_p95 = np.percentile(sizes, [50, 95])
+        else:
+            size_avg = size_min = size_max = size_median = size_p95 = 0
+        
         data_str = f"""
 Network Traffic Analysis Data:
 
@@ -309,42 +336,45 @@ Port Analysis:
 - UDP Ports: {list(set(packet_summary.port_analysis.get('udp', [])))[:10]}
 
 Packet Size Statistics:
-- Average: {sum(packet_summary.packet_sizes) / len(packet_summary.packet_sizes) if packet_summary.packet_sizes else 0:.2f} bytes
-- Min: {min(packet_summary.packet_sizes) if packet_summary.packet_sizes else 0} bytes
-- Max: {max(packet_summary.packet_sizes) if packet_summary.packet_sizes else 0} bytes
+- Average: {size_avg:.2f} bytes
+- Median: {size_median:.0f} bytes
+- 95th percentile: {size_p95:.0f} bytes
+- Min: {size_min} bytes
+- Max: {size_max} bytes
 
 Suspicious Patterns Detected:
 {chr(10).join(packet_summary.suspicious_patterns) if packet_summary.suspicious_patterns else "None detected"}
 """
         return data_str
     
-    def query_ai_with_packets(self, user_query: str, packets: List[Packet], provider_name: Optional[str] = None) -> Dict[str, Any]:
+    def query_ai_with_packets(self, user_query: str, packets: List[Packet], provider_name: Optional[str] = None,
+                              packet_summary: Optional[PacketSummary] = None,
+                              on_response: Optional[Callable[[Any], None]] = None) -> Dict[str, Any]:
         """
-        Send query to AI system with actual packet data (for multi-agent system)
+        Send query to AI system with actual packet data (for multi-agent system).
+        A precomputed packet_summary spares the fallback path another pass over the packets.
+        on_response is handed each multi-agent chunk response as it arrives.
         """
         # Try multi-agent system first if available
         if USE_MULTI_AGENT and hasattr(multi_agent, 'active_providers') and multi_agent.active_providers:  # type: ignore[possibly-unbound]
             try:
-                # Use async query with actual packets
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+                # Use async query with actual packets on the shared AI event loop
                 try:
                     # Pass provider_name to multi-agent query
-                    result = loop.run_until_complete(query_ai_async(user_query, packets, provider_name=provider_name))  # type: ignore[possibly-unbound]
+                    result = run_sync(query_ai_async(user_query, packets, provider_name=provider_name, on_response=on_response))  # type: ignore[possibly-unbound]
                     if result.get('success'):
                         return result
                     else:
                         logger.warning(f"Multi-agent query failed: {result.get('error')}")
                 except Exception as e:
                     logger.error(f"Multi-agent async query error: {e}")
-                finally:
-                    loop.close()
                     
             except Exception as e:
                 logger.error(f"Multi-agent system error: {e}")
         
         # Fallback to original Groq implementation with packet summary
-        packet_summary = self.extract_packet_statistics(packets)
+        if packet_summary is None:
+            packet_summary = self.extract_packet_statistics(packets)
         return self.query_ai(user_query, packet_summary)
     
     def query_ai(self, user_query: str, packet_summary: PacketSummary) -> Dict[str, Any]:
@@ -360,19 +390,15 @@ Suspicious Patterns Detected:
                 # Legacy: Uses empty packet list for compatibility with PacketSummary-based queries
                 dummy_packets = []
                 
-                # Use async query with run_until_complete for sync compatibility
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+                # Run the async query on the shared AI event loop for sync compatibility
                 try:
-                    result = loop.run_until_complete(query_ai_async(user_query, dummy_packets))  # type: ignore[possibly-unbound]
+                    result = run_sync(query_ai_async(user_query, dummy_packets))  # type: ignore[possibly-unbound]
                     if result.get('success'):
                         return result
                     else:
                         logger.warning(f"Multi-agent query failed: {result.get('error')}")
                 except Exception as e:
                     logger.error(f"Multi-agent async query error: {e}")
-                finally:
-                    loop.close()
                     
             except Exception as e:
                 logger.error(f"Multi-agent system error: {e}")
@@ -402,7 +428,7 @@ Please provide a clear, concise, and professional analysis. Focus on security im
                 "temperature": 0.7,
             }
 
-            response = requests.post(
+            response = _SESSION.post(
                 self.api_url,
                 headers=self.headers,
                 json=payload,
@@ -497,8 +523,8 @@ Please provide a clear, concise, and professional analysis. Focus on security im
             
             response = f"""**Port Analysis:**
 
-**TCP Ports:** {sorted(list(tcp_ports))[:10]}
-**UDP Ports:** {sorted(list(udp_ports))[:10]}
+**TCP Ports:** {heapq.nsmallest(10, tcp_ports)}
+**UDP Ports:** {heapq.nsmallest(10, udp_ports)}
 
 **Common Ports Analysis:**
 - HTTP/HTTPS (80/443): {'Present' if 80 in tcp_ports or 443 in tcp_ports else 'Not detected'}
@@ -6,13 +6,30 @@ Supports multiple AI providers with visual badges and clean UX.
 """
 
 import streamlit as st
-from typing import List, Dict, Any
-from src.ai.ai_module import ai_engine
+from functools import lru_cache
+from typing import Callable, List, Dict, Any, Optional
+from src.ai.ai_module import ai_engine, PacketSummary
 from scapy.packet import Packet
 import time
 import os
+import random
+import hashlib
+import queue
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from src.ui.icons import icon
+from src.utils.helpers import capture_key
+
+# Answers to repeated questions about the same capture are reused per session
+QUERY_CACHE_KEY = "ai_query_cache"
+QUERY_CACHE_SIZE = 32
+
+# Packets sampled for the quick stats card
+QUICK_STATS_SAMPLE = 1000
+
+# Seconds between checks for newly arrived chunk answers while a query runs
+PARTIAL_POLL_INTERVAL = 0.1
 
 
 def get_provider_info(provider: str) -> tuple[str, str, str]:
@@ -101,40 +118,45 @@ def render_chat_messages() -> None:
     
     # Chat container
     for msg in messages:
-        query = msg.get('query', '')
         response = msg.get('response', {})
-        timestamp = msg.get('timestamp', '')
-        provider = msg.get('provider', 'AI')
-        
-        # User message
-        st.markdown(f"""
-            <div style="display: flex; justify-content: flex-end; margin-bottom: 1rem;">
-                <div style="max-width: 80%; background: var(--accent-cyan-dim); border: 1px solid var(--accent-cyan); 
-                            border-radius: 16px 16px 4px 16px; padding: 1rem;">
-                    <div style="color: var(--text-primary);">{query}</div>
-                    <div style="color: var(--text-muted); font-size: 0.75rem; margin-top: 0.5rem; text-align: right;">
-                        {timestamp}
-                    </div>
+        response_text = response.get('analysis', response) if isinstance(response, dict) else response
+        st.markdown(
+            _chat_exchange_html(
+                msg.get('query', ''),
+                str(response_text),
+                msg.get('timestamp', ''),
+                msg.get('provider', 'AI'),
+            ),
+            unsafe_allow_html=True,
+        )
+
+
+@lru_cache(maxsize=64)
+def _chat_exchange_html(query: str, response_text: str, timestamp: str, provider: str) -> str:
+    """Build the user/AI bubble pair once; Streamlit reruns re-render the whole history."""
+    icon_name, label, _ = get_provider_info(provider)
+    provider_icon = icon(icon_name)
+    
+    return f"""
+        <div style="display: flex; justify-content: flex-end; margin-bottom: 1rem;">
+            <div style="max-width: 80%; background: var(--accent-cyan-dim); border: 1px solid var(--accent-cyan); 
+                        border-radius: 16px 16px 4px 16px; padding: 1rem;">
+                <div style="color: var(--text-primary);">{query}</div>
+                <div style="color: var(--text-muted); font-size: 0.75rem; margin-top: 0.5rem; text-align: right;">
+                    {timestamp}
                 </div>
             </div>
-        """, unsafe_allow_html=True)
-        
-        # AI response
-        response_text = response.get('analysis', response) if isinstance(response, dict) else str(response)
-        icon_name, label, _ = get_provider_info(provider)
-        provider_icon = icon(icon_name)
-        
-        st.markdown(f"""
-            <div style="display: flex; justify-content: flex-start; margin-bottom: 1rem;">
-                <div style="max-width: 80%; background: var(--bg-tertiary); border: 1px solid var(--border-subtle); 
-                            border-radius: 16px 16px 16px 4px; padding: 1rem;">
-                    <div style="display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;">
-                        <span style="font-weight: 600; color: var(--accent-purple);">{provider_icon} {label}</span>
-                    </div>
-                    <div style="color: var(--text-primary); line-height: 1.6;">{response_text}</div>
+        </div>
+        <div style="display: flex; justify-content: flex-start; margin-bottom: 1rem;">
+            <div style="max-width: 80%; background: var(--bg-tertiary); border: 1px solid var(--border-subtle); 
+                        border-radius: 16px 16px 16px 4px; padding: 1rem;">
+                <div style="display: flex; align-items: center; gap: 0.5rem; margin-bottom: 0.5rem;">
+                    <span style="font-weight: 600; color: var(--accent-purple);">{provider_icon} {label}</span>
                 </div>
+                <div style="color: var(--text-primary); line-height: 1.6;">{response_text}</div>
             </div>
-        """, unsafe_allow_html=True)
+        </div>
+    """
 
 
 def render_suggested_queries() -> str:
@@ -161,26 +183,101 @@ def render_suggested_queries() -> str:
     return selected_query
 
 
-def send_query(query: str, packets: List[Packet], provider: str) -> Dict[str, Any]:
-    """Send query to AI and get response."""
+def query_cache_key(query: str, packets: List[Packet], provider: str, capture_id: Optional[str] = None) -> str:
+    """Digest of the normalized query, the provider and the capture it is asked about."""
+    normalized = " ".join(query.lower().split())
+    raw = f"{normalized}\0{provider}\0{capture_id or capture_key(packets)}".encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def send_query(query: str, packets: List[Packet], provider: str,
+               packet_summary: Optional[PacketSummary] = None,
+               capture_id: Optional[str] = None,
+               on_partial: Optional[Callable[[List[Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Send query to AI and get response, reusing the answer to an identical earlier query.
+    
+    capture_id identifies the capture's contents (e.g. the upload's digest); without
+    it the packets are hashed. on_partial, if given, is called on this thread with
+    the chunk responses received so far each time another one arrives.
+    """
+    cache = st.session_state.setdefault(QUERY_CACHE_KEY, OrderedDict())
+    key = query_cache_key(query, packets, provider, capture_id)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    
+    if on_partial is None:
+        response = _dispatch_query(query, packets, provider, packet_summary)
+    else:
+        response = _dispatch_streaming(query, packets, provider, packet_summary, on_partial)
+    if isinstance(response, dict) and response.get("success"):
+        cache[key] = response
+        if len(cache) > QUERY_CACHE_SIZE:
+            cache.popitem(last=False)
+    return response
+
+
+def _dispatch_query(query: str, packets: List[Packet], provider: str,
+                    packet_summary: Optional[PacketSummary] = None,
+                    on_response: Optional[Callable[[Any], None]] = None) -> Dict[str, Any]:
+    """Send query to the selected AI provider."""
     try:
         # Use AI engine's query_ai_with_packets which handles packet processing correctly
         # This method creates a proper PacketSummary internally with all required fields
         if provider == "Auto (Load Balanced)" or not provider:
-            response = ai_engine.query_ai_with_packets(query, packets)
+            response = ai_engine.query_ai_with_packets(query, packets, packet_summary=packet_summary,
+                                                       on_response=on_response)
         else:
-            response = ai_engine.query_ai_with_packets(query, packets, provider_name=provider)
+            response = ai_engine.query_ai_with_packets(query, packets, provider_name=provider, packet_summary=packet_summary,
+                                                       on_response=on_response)
         return response
     except Exception as e:
         return {"success": False, "error": str(e), "response": f"Error: {str(e)}"}
 
 
-def render_ai_query_interface(packets: List[Packet]) -> None:
+def _dispatch_streaming(query: str, packets: List[Packet], provider: str,
+                        packet_summary: Optional[PacketSummary],
+                        on_partial: Callable[[List[Any]], None]) -> Dict[str, Any]:
+    """
+    _dispatch_query on a worker thread, passing chunk responses to on_partial as they arrive.
+    
+    Responses come in on the AI event loop's thread; they are queued and handed
+    to on_partial here, on the script thread, where Streamlit calls are allowed.
+    """
+    arrived: "queue.SimpleQueue" = queue.SimpleQueue()
+    received = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(_dispatch_query, query, packets, provider, packet_summary, arrived.put)
+        while not (future.done() and arrived.empty()):
+            try:
+                received.append(arrived.get(timeout=PARTIAL_POLL_INTERVAL))
+            except queue.Empty:
+                continue
+            on_partial(received)
+        return future.result()
+
+
+def _partial_results_markdown(responses: List[Any]) -> str:
+    """Markdown for the chunk answers received so far, in arrival order."""
+    answered = [r for r in responses if r.success]
+    parts = [f"⏳ **{len(answered)} chunk(s) analyzed so far**"]
+    parts.extend(f"**{r.provider}**\n\n{r.response}" for r in answered)
+    return "\n\n---\n\n".join(parts)
+
+
+def render_ai_query_interface(packets: List[Packet], packet_summary: Optional[PacketSummary] = None,
+                              capture_id: Optional[str] = None) -> None:
     """Render the main AI query interface."""
+    from src.ai.multi_agent_ai import prewarm_providers
+    
     # Initialize session state
     if 'ai_responses' not in st.session_state:
         st.session_state.ai_responses = []
     
+    # Refresh provider connections while the user reads and types
+    prewarm_providers()
+    
     # AI Panel Header
     st.markdown("""
         <div class="sr-ai-panel">
@@ -227,7 +324,13 @@ def render_ai_query_interface(packets: List[Packet]) -> None:
     # Handle query submission
     if (send_clicked or suggested) and query:
         with st.spinner("Analyzing packets..."):
-            response = send_query(query, packets, selected_provider)
+            # Show each chunk's answer as it arrives instead of waiting for the whole capture
+            partial = st.empty()
+            response = send_query(
+                query, packets, selected_provider, packet_summary, capture_id,
+                on_partial=lambda received: partial.markdown(_partial_results_markdown(received))
+            )
+            partial.empty()
             
             # Add to chat history
             st.session_state.ai_responses.append({
@@ -243,6 +346,7 @@ def render_ai_query_interface(packets: List[Packet]) -> None:
     if st.session_state.ai_responses:
         if st.button("🗑️ Clear Chat", key="clear_chat"):
             st.session_state.ai_responses = []
+            st.session_state.pop(QUERY_CACHE_KEY, None)
             st.rerun()
 
 
@@ -261,13 +365,16 @@ def render_ai_quick_analysis(packets: List[Packet]) -> None:
     
     # Calculate quick stats
     total = len(packets)
-    protocols = {}
+    protocols = Counter()
     ips = set()
     
-    for pkt in packets[:1000]:  # Sample first 1000
+    # Seeded uniform sample: large captures are represented beyond their first packets,
+    # and the figures stay stable across reruns
+    sample = packets if total <= QUICK_STATS_SAMPLE else random.Random(0).sample(packets, QUICK_STATS_SAMPLE)
+    for pkt in sample:
         if hasattr(pkt, 'payload') and hasattr(pkt.payload, 'name'):
             proto = pkt.payload.name
-            protocols[proto] = protocols.get(proto, 0) + 1
+            protocols[proto] += 1
         if hasattr(pkt, 'src'):
             ips.add(str(pkt.src))
         if hasattr(pkt, 'dst'):
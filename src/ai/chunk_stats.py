@@ -0,0 +1,161 @@
+"""
+Chunk statistics for the multi-agent AI system.
+
+Pure functions over packet fields, kept free of provider setup so worker
+processes can import them cheaply.
+"""
+
+from array import array
+from socket import inet_aton, inet_ntoa
+from struct import unpack_from
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from scapy.packet import Packet
+from scapy.layers.inet import IP, TCP, UDP
+from scapy.layers.l2 import Ether
+from src.utils.helpers import ipv4_header
+
+# (proto, src, dst, dport, syn) with addresses as integers and dport -1 when absent
+Fields = Tuple[int, int, int, int, int]
+
+# IP protocol number -> index into PROTOCOL_LABELS for the chunk protocol histogram
+PROTOCOL_LABELS = ("TCP", "UDP", "ICMP", "Other")
+PROTOCOL_CODES = np.full(256, 3, dtype=np.uint8)
+PROTOCOL_CODES[[6, 17, 1]] = [0, 1, 2]
+
+def _ordered_counts(values: np.ndarray, key_func=None) -> Dict[Any, int]:
+    """Histogram of an array as a dict, keyed in order of first appearance"""
+    keys, first_seen, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first_seen)
+    keys = keys[order].tolist()
+    if key_func is not None:
+        keys = [key_func(key) for key in keys]
+    return dict(zip(keys, counts[order].tolist()))
+
+def _ip_str(address: int) -> str:
+    """Dotted-quad form of an IPv4 address held as an integer"""
+    return inet_ntoa(address.to_bytes(4, "big"))
+
+def _raw_ipv4_fields(buf: bytes) -> Optional[Tuple[int, int, int, int, int]]:
+    """
+    Read (proto, src, dst, dport, syn) from an Ethernet/IPv4 frame without scapy.
+    
+    Returns None whenever scapy's dissection could differ, so the caller falls back.
+    """
+    header = ipv4_header(buf)
+    if header is None:
+        return None
+    proto, src, dst, offset, fragment = header
+    dport = -1
+    syn = 0
+    if not fragment and proto in (6, 17):
+        dport = unpack_from("!H", buf, offset + 2)[0]
+        if proto == 6 and buf[offset + 13] & 0x02:  # SYN flag
+            syn = 1
+    return proto, int.from_bytes(src, "big"), int.from_bytes(dst, "big"), dport, syn
+
+def _scapy_ipv4_fields(pkt: Packet) -> Optional[Tuple[int, int, int, int, int]]:
+    """Same fields as _raw_ipv4_fields, read through scapy's dissected layers"""
+    ip_layer = pkt.getlayer(IP)
+    if ip_layer is None:
+        return None
+    proto_num = ip_layer.proto
+    dport = -1
+    syn = 0
+    if proto_num == 6:
+        tcp_layer = pkt.getlayer(TCP)
+        if tcp_layer is not None:
+            dport = tcp_layer.dport
+            syn = 1 if tcp_layer.flags & 0x02 else 0  # SYN flag
+    elif proto_num == 17:
+        udp_layer = pkt.getlayer(UDP)
+        if udp_layer is not None:
+            dport = udp_layer.dport
+    src = int.from_bytes(inet_aton(ip_layer.src), "big")
+    dst = int.from_bytes(inet_aton(ip_layer.dst), "big")
+    return proto_num, src, dst, dport, syn
+
+def packet_fields(packets: Iterable[Packet]) -> Iterator[Fields]:
+    """Fields of every IPv4 packet, from the captured bytes when possible"""
+    for pkt in packets:
+        fields = _raw_ipv4_fields(pkt.original) if pkt.__class__ is Ether and pkt.original else None
+        if fields is None:
+            fields = _scapy_ipv4_fields(pkt)
+        if fields is not None:
+            yield fields
+
+def frame_fields(frames: Iterable[Tuple[type, bytes]]) -> Iterator[Fields]:
+    """Fields of every IPv4 frame given as (packet class, raw bytes)"""
+    for cls, buf in frames:
+        fields = _raw_ipv4_fields(buf) if cls is Ether else None
+        if fields is None:
+            fields = _scapy_ipv4_fields(cls(buf))
+        if fields is not None:
+            yield fields
+
+def chunk_statistics(fields: Iterable[Fields], total_packets: int, packet_sizes: Sequence[int]) -> Dict[str, Any]:
+    """Build the statistics dict of one chunk from its packet fields"""
+    stats = {
+        "total_packets": total_packets,
+        "protocols": {},
+        "src_ips": {},
+        "dst_ips": {},
+        "ports": {"tcp": {}, "udp": {}},
+        "suspicious_patterns": [],
+        "size_sum": int(np.sum(packet_sizes)),
+        "size_count": len(packet_sizes)
+    }
+    
+    # Structure-of-arrays layout: integer columns filled in one pass, NumPy does the counting
+    src_col = array('I')
+    dst_col = array('I')
+    proto_col = array('B')
+    dport_col = array('i')  # -1 when the transport header is missing
+    syn_col = array('B')
+
+    for proto_num, src_ip, dst_ip, dport, syn in fields:
+        src_col.append(src_ip)
+        dst_col.append(dst_ip)
+        proto_col.append(proto_num)
+        dport_col.append(dport)
+        syn_col.append(syn)
+
+    src = np.frombuffer(src_col, dtype=np.uint32)
+    proto = np.frombuffer(proto_col, dtype=np.uint8)
+    dport = np.frombuffer(dport_col, dtype=np.int32)
+    syn = np.frombuffer(syn_col, dtype=np.uint8).astype(bool)
+    tcp = (proto == 6) & (dport >= 0)
+    udp = (proto == 17) & (dport >= 0)
+
+    # Count IPs and protocols; only distinct addresses are formatted as strings
+    stats["src_ips"] = _ordered_counts(src, _ip_str)
+    stats["dst_ips"] = _ordered_counts(np.frombuffer(dst_col, dtype=np.uint32), _ip_str)
+    codes = PROTOCOL_CODES[proto]
+    protocol_counts = np.bincount(codes, minlength=len(PROTOCOL_LABELS))
+    present = np.flatnonzero(protocol_counts)
+    first_seen = [int(np.argmax(codes == code)) for code in present]
+    stats["protocols"] = {
+        PROTOCOL_LABELS[code]: int(protocol_counts[code])
+        for _, code in sorted(zip(first_seen, present.tolist()))
+    }
+    stats["ports"]["tcp"] = _ordered_counts(dport[tcp])
+    stats["ports"]["udp"] = _ordered_counts(dport[udp])
+
+    # Check for SYN flood: one message per source over the threshold
+    patterns = stats["suspicious_patterns"]
+    syn_flood = _ordered_counts(src[tcp & syn])
+    patterns.extend(f"Potential SYN flood from {_ip_str(src_ip)}" for src_ip, count in syn_flood.items() if count > 50)
+
+    # Check for suspicious ports: each distinct (port, source) pair is formatted once
+    for label, mask, ports in (("TCP", tcp, [0, 65535, 31337, 6667]), ("UDP", udp, [0, 65535, 31337])):
+        flagged = mask & np.isin(dport, ports)
+        pairs = (dport[flagged].astype(np.uint64) << np.uint64(32)) | src[flagged]
+        for pair in _ordered_counts(pairs):
+            patterns.append(f"Suspicious {label} port {pair >> 32} from {_ip_str(pair & 0xFFFFFFFF)}")
+
+    return stats
+
+def chunk_statistics_from_frames(job: Tuple[List[Tuple[type, bytes]], Sequence[int]]) -> Dict[str, Any]:
+    """Process-pool entry point: statistics of one chunk shipped as raw frames"""
+    frames, packet_sizes = job
+    return chunk_statistics(frame_fields(frames), len(frames), packet_sizes)
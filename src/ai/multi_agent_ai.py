@@ -6,22 +6,27 @@ Supports multiple AI providers with intelligent load balancing and chunking for
 
 import os
 import json
-import requests
 import asyncio
 import aiohttp
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Sequence, Tuple
+from dataclasses import dataclass, field, replace
+from collections import OrderedDict, deque
 from abc import ABC, abstractmethod
-import pandas as pd
+import numpy as np
 from scapy.packet import Packet
-from scapy.layers.inet import IP, TCP, UDP, ICMP
+from src.utils.helpers import POOL_JOB_TIMEOUT, packet_length, pool_map, process_pool
+from src.ai.chunk_stats import chunk_statistics, chunk_statistics_from_frames, packet_fields
 import logging
 from dotenv import load_dotenv
 import time
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
+import heapq
+from operator import itemgetter
+import concurrent.futures
 import math
 import random  # For randomizing provider order
+import threading
+import atexit
 
 # Load environment variables
 load_dotenv('/app/.env')  # Explicitly load from Docker mounted path
@@ -30,6 +35,47 @@ load_dotenv('/app/.env')  # Explicitly load from Docker mounted path
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Successful chunk answers kept for identical prompt + chunk context pairs
+RESPONSE_CACHE_SIZE = 512
+
+# Captures at least this large get their chunk statistics computed across worker processes
+PARALLEL_STATS_MIN_PACKETS = 200000
+
+# Weight of the newest response time in each provider's latency moving average
+LATENCY_EWMA_ALPHA = 0.3
+
+# A failed query is scored as if it had hit the 60 s request timeout, so a provider that
+# keeps failing (out of quota, 429, 5xx) stops being picked first
+FAILURE_LATENCY_PENALTY = 60.0
+
+# Idle keep-alive connections are dropped after 75 s; refresh them a little before that
+PREWARM_INTERVAL = 60.0
+
+# Upper bound on the startup connection tests, which run while this module is imported
+PROVIDER_TEST_TIMEOUT = 30.0
+
+# One event loop serves every synchronous caller, so provider sessions and pools outlive a query
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop, starting its thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="multi-agent-ai-loop", daemon=True).start()
+        return _loop
+
+def run_sync(coro, timeout: Optional[float] = None):
+    """Run a coroutine on the shared background loop and wait for its result"""
+    future = asyncio.run_coroutine_threadsafe(coro, _background_loop())
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
 @dataclass
 class AIResponse:
     """Standardized AI response format"""
@@ -43,16 +89,39 @@ class AIResponse:
 
 @dataclass
 class PacketChunk:
-    """Packet data chunk for processing"""
+    """Packet data chunk for processing: the [start, end) range of a shared packet list"""
     chunk_id: str
-    packets: List[Packet]
+    source: List[Packet] = field(repr=False)
+    start: int
+    end: int
     summary: Dict[str, Any]
     size_mb: float
     packet_count: int
+    
+    @property
+    def packets(self) -> List[Packet]:
+        """The chunk's packets, sliced from the source list only when asked for"""
+        if self.start == 0 and self.end == len(self.source):
+            return self.source
+        return self.source[self.start:self.end]
 
 class AIProvider(ABC):
     """Abstract base class for AI providers"""
     
+    # Keep-alive HTTP session shared by every query on the same event loop
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+    # Open connections allowed to the provider's host (set by MultiAgentAI)
+    pool_per_host: int = 8
+    # Queries allowed in flight at once, so chunk fan-out stays under rate limits (set by MultiAgentAI)
+    max_concurrency: int = 8
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+    # Whether the model reliably answers a batched prompt with the requested JSON array
+    follows_batch_format: bool = True
+    # Cheap authenticated GET used to keep the connection warm (set by each provider)
+    models_url: Optional[str] = None
+    
     @abstractmethod
     def __init__(self, api_key: str, model_name: Optional[str] = None):
         pass
@@ -62,7 +131,7 @@ class AIProvider(ABC):
         pass
     
     @abstractmethod
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         pass
     
     @property
@@ -74,6 +143,50 @@ class AIProvider(ABC):
     @abstractmethod
     def max_tokens(self) -> int:
         pass
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return this provider's session, creating it for the running loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.pool_per_host,
+                keepalive_timeout=75,
+                use_dns_cache=True,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+        return self._session
+    
+    async def warm(self) -> None:
+        """Open or refresh a keep-alive connection with an authenticated model listing; the answer is ignored"""
+        if not self.models_url:
+            return
+        try:
+            session = await self._get_session()
+            async with session.get(
+                self.models_url,
+                headers=getattr(self, "headers", None),
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                await response.read()
+        except Exception as e:
+            logger.debug(f"{self.name} connection warm-up failed: {e}")
+    
+    def query_slots(self) -> asyncio.Semaphore:
+        """Return the semaphore bounding concurrent queries, created for the running loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(max(self.max_concurrency, 1))
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
 
 class GroqProvider(AIProvider):
     """Groq AI Provider"""
@@ -82,6 +195,7 @@ class GroqProvider(AIProvider):
         self.api_key = api_key
         self.model_name = model_name
         self.api_url = "https://api.groq.com/openai/v1/chat/completions"
+        self.models_url = "https://api.groq.com/openai/v1/models"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
@@ -95,14 +209,15 @@ class GroqProvider(AIProvider):
     def max_tokens(self) -> int:
         return 8192
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         try:
-            response = requests.get(
-                "https://api.groq.com/openai/v1/models",
+            session = await self._get_session()
+            async with session.get(
+                self.models_url,
                 headers=self.headers,
-                timeout=10
-            )
-            return response.status_code == 200
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                return response.status == 200
         except Exception as e:
             logger.error(f"Groq connection test failed: {e}")
             return False
@@ -128,32 +243,32 @@ class GroqProvider(AIProvider):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        response_time = time.time() - start_time
-                        
-                        return AIResponse(
-                            success=True,
-                            response=data["choices"][0]["message"]["content"],
-                            provider=self.name,
-                            tokens_used=data.get("usage", {}).get("total_tokens"),
-                            response_time=response_time
-                        )
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(
-                            success=False,
-                            response="",
-                            error=f"HTTP {response.status}: {error_text}",
-                            provider=self.name
-                        )
+            session = await self._get_session()
+            async with session.post(
+                self.api_url,
+                headers=self.headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    response_time = time.time() - start_time
+                    
+                    return AIResponse(
+                        success=True,
+                        response=data["choices"][0]["message"]["content"],
+                        provider=self.name,
+                        tokens_used=data.get("usage", {}).get("total_tokens"),
+                        response_time=response_time
+                    )
+                else:
+                    error_text = await response.text()
+                    return AIResponse(
+                        success=False,
+                        response="",
+                        error=f"HTTP {response.status}: {error_text}",
+                        provider=self.name
+                    )
         
         except Exception as e:
             return AIResponse(
@@ -170,6 +285,7 @@ class OpenAIProvider(AIProvider):
         self.api_key = api_key
         self.model_name = model_name
         self.api_url = "https://api.openai.com/v1/chat/completions"
+        self.models_url = "https://api.openai.com/v1/models"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
@@ -183,14 +299,15 @@ class OpenAIProvider(AIProvider):
     def max_tokens(self) -> int:
         return 4096 if "gpt-3.5" in self.model_name else 8192
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         try:
-            response = requests.get(
-                "https://api.openai.com/v1/models",
+            session = await self._get_session()
+            async with session.get(
+                self.models_url,
                 headers=self.headers,
-                timeout=10
-            )
-            return response.status_code == 200
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                return response.status == 200
         except Exception as e:
             logger.error(f"OpenAI connection test failed: {e}")
             return False
@@ -215,32 +332,32 @@ class OpenAIProvider(AIProvider):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        response_time = time.time() - start_time
-                        
-                        return AIResponse(
-                            success=True,
-                            response=data["choices"][0]["message"]["content"],
-                            provider=self.name,
-                            tokens_used=data.get("usage", {}).get("total_tokens"),
-                            response_time=response_time
-                        )
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(
-                            success=False,
-                            response="",
-                            error=f"HTTP {response.status}: {error_text}",
-                            provider=self.name
-                        )
+            session = await self._get_session()
+            async with session.post(
+                self.api_url,
+                headers=self.headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    response_time = time.time() - start_time
+                    
+                    return AIResponse(
+                        success=True,
+                        response=data["choices"][0]["message"]["content"],
+                        provider=self.name,
+                        tokens_used=data.get("usage", {}).get("total_tokens"),
+                        response_time=response_time
+                    )
+                else:
+                    error_text = await response.text()
+                    return AIResponse(
+                        success=False,
+                        response="",
+                        error=f"HTTP {response.status}: {error_text}",
+                        provider=self.name
+                    )
         
         except Exception as e:
             return AIResponse(
@@ -257,6 +374,7 @@ class AnthropicProvider(AIProvider):
         self.api_key = api_key
         self.model_name = model_name
         self.api_url = "https://api.anthropic.com/v1/messages"
+        self.models_url = "https://api.anthropic.com/v1/models"
         self.headers = {
             "x-api-key": api_key,
             "Content-Type": "application/json",
@@ -271,7 +389,7 @@ class AnthropicProvider(AIProvider):
     def max_tokens(self) -> int:
         return 4096
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         # Anthropic doesn't have a simple models endpoint, so we'll test with a minimal request
         try:
             payload = {
@@ -279,13 +397,14 @@ class AnthropicProvider(AIProvider):
                 "max_tokens": 10,
                 "messages": [{"role": "user", "content": "Hello"}]
             }
-            response = requests.post(
+            session = await self._get_session()
+            async with session.post(
                 self.api_url,
                 headers=self.headers,
                 json=payload,
-                timeout=10
-            )
-            return response.status_code == 200
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                return response.status == 200
         except Exception as e:
             logger.error(f"Anthropic connection test failed: {e}")
             return False
@@ -305,32 +424,32 @@ class AnthropicProvider(AIProvider):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        response_time = time.time() - start_time
-                        
-                        return AIResponse(
-                            success=True,
-                            response=data["content"][0]["text"],
-                            provider=self.name,
-                            tokens_used=data.get("usage", {}).get("input_tokens", 0) + data.get("usage", {}).get("output_tokens", 0),
-                            response_time=response_time
-                        )
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(
-                            success=False,
-                            response="",
-                            error=f"HTTP {response.status}: {error_text}",
-                            provider=self.name
-                        )
+            session = await self._get_session()
+            async with session.post(
+                self.api_url,
+                headers=self.headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    response_time = time.time() - start_time
+                    
+                    return AIResponse(
+                        success=True,
+                        response=data["content"][0]["text"],
+                        provider=self.name,
+                        tokens_used=data.get("usage", {}).get("input_tokens", 0) + data.get("usage", {}).get("output_tokens", 0),
+                        response_time=response_time
+                    )
+                else:
+                    error_text = await response.text()
+                    return AIResponse(
+                        success=False,
+                        response="",
+                        error=f"HTTP {response.status}: {error_text}",
+                        provider=self.name
+                    )
         
         except Exception as e:
             return AIResponse(
@@ -347,6 +466,7 @@ class GoogleGeminiProvider(AIProvider):
         self.api_key = api_key
         self.model_name = model_name
         self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent"
+        self.models_url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
         self.headers = {
             "Content-Type": "application/json"
         }
@@ -359,16 +479,17 @@ class GoogleGeminiProvider(AIProvider):
     def max_tokens(self) -> int:
         return 8192  # Gemini Flash supports up to 8K output tokens
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         try:
+            session = await self._get_session()
             # First, list models to verify API key validity and available models
-            list_url = f"https://generativelanguage.googleapis.com/v1beta/models?key={self.api_key}"
-            list_resp = requests.get(list_url, timeout=10)
-            if list_resp.status_code != 200:
-                logger.warning(f"Google Gemini ListModels failed: HTTP {list_resp.status_code} {list_resp.text[:200]}")
-                return False
+            async with session.get(self.models_url, timeout=aiohttp.ClientTimeout(total=10)) as list_resp:
+                if list_resp.status != 200:
+                    list_text = await list_resp.text()
+                    logger.warning(f"Google Gemini ListModels failed: HTTP {list_resp.status} {list_text[:200]}")
+                    return False
+                data = await list_resp.json() or {}
 
-            data = list_resp.json() or {}
             models = data.get("models", [])
 
             # See if configured model exists and supports generateContent
@@ -414,12 +535,14 @@ class GoogleGeminiProvider(AIProvider):
                 "contents": [{"parts": [{"text": "Hello"}]}],
                 "generationConfig": {"maxOutputTokens": 8}
             }
-            response = requests.post(test_url, headers=self.headers, json=payload, timeout=10)
-            if response.status_code == 200:
-                return True
-            else:
+            async with session.post(
+                test_url, headers=self.headers, json=payload, timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    return True
                 # Log a concise reason for diagnostics
-                logger.warning(f"Google Gemini generateContent failed (model={self.model_name}): HTTP {response.status_code} {response.text[:200]}")
+                error_text = await response.text()
+                logger.warning(f"Google Gemini generateContent failed (model={self.model_name}): HTTP {response.status} {error_text[:200]}")
                 return False
         except Exception as e:
             logger.error(f"Google Gemini connection test failed: {e}")
@@ -453,38 +576,38 @@ class GoogleGeminiProvider(AIProvider):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    api_url_with_key,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        response_time = time.time() - start_time
-                        
-                        # Extract text from Gemini response format
-                        response_text = data["candidates"][0]["content"]["parts"][0]["text"]
-                        
-                        # Gemini uses different token counting
-                        tokens_used = data.get("usageMetadata", {}).get("totalTokenCount", 0)
-                        
-                        return AIResponse(
-                            success=True,
-                            response=response_text,
-                            provider=self.name,
-                            tokens_used=tokens_used,
-                            response_time=response_time
-                        )
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(
-                            success=False,
-                            response="",
-                            error=f"HTTP {response.status}: {error_text}",
-                            provider=self.name
-                        )
+            session = await self._get_session()
+            async with session.post(
+                api_url_with_key,
+                headers=self.headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    response_time = time.time() - start_time
+                    
+                    # Extract text from Gemini response format
+                    response_text = data["candidates"][0]["content"]["parts"][0]["text"]
+                    
+                    # Gemini uses different token counting
+                    tokens_used = data.get("usageMetadata", {}).get("totalTokenCount", 0)
+                    
+                    return AIResponse(
+                        success=True,
+                        response=response_text,
+                        provider=self.name,
+                        tokens_used=tokens_used,
+                        response_time=response_time
+                    )
+                else:
+                    error_text = await response.text()
+                    return AIResponse(
+                        success=False,
+                        response="",
+                        error=f"HTTP {response.status}: {error_text}",
+                        provider=self.name
+                    )
         
         except Exception as e:
             return AIResponse(
@@ -501,6 +624,7 @@ class xAIProvider(AIProvider):
         self.api_key = api_key
         self.model_name = model_name
         self.api_url = "https://api.x.ai/v1/chat/completions"
+        self.models_url = "https://api.x.ai/v1/models"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
@@ -514,7 +638,7 @@ class xAIProvider(AIProvider):
     def max_tokens(self) -> int:
         return 131072  # Grok supports 128K context window
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         try:
             # Test with a minimal request
             payload = {
@@ -523,16 +647,17 @@ class xAIProvider(AIProvider):
                 "max_tokens": 10,
                 "temperature": 0
             }
-            response = requests.post(
+            session = await self._get_session()
+            async with session.post(
                 self.api_url,
                 headers=self.headers,
                 json=payload,
-                timeout=10
-            )
-            if response.status_code == 200:
-                return True
-            else:
-                logger.warning(f"xAI connection test failed: HTTP {response.status_code} {response.text[:200]}")
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status == 200:
+                    return True
+                error_text = await response.text()
+                logger.warning(f"xAI connection test failed: HTTP {response.status} {error_text[:200]}")
                 return False
         except Exception as e:
             logger.error(f"xAI connection test failed: {e}")
@@ -559,32 +684,32 @@ class xAIProvider(AIProvider):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        response_time = time.time() - start_time
-                        
-                        return AIResponse(
-                            success=True,
-                            response=data["choices"][0]["message"]["content"],
-                            provider=self.name,
-                            tokens_used=data.get("usage", {}).get("total_tokens"),
-                            response_time=response_time
-                        )
-                    else:
-                        error_text = await response.text()
-                        return AIResponse(
-                            success=False,
-                            response="",
-                            error=f"HTTP {response.status}: {error_text}",
-                            provider=self.name
-                        )
+            session = await self._get_session()
+            async with session.post(
+                self.api_url,
+                headers=self.headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    response_time = time.time() - start_time
+                    
+                    return AIResponse(
+                        success=True,
+                        response=data["choices"][0]["message"]["content"],
+                        provider=self.name,
+                        tokens_used=data.get("usage", {}).get("total_tokens"),
+                        response_time=response_time
+                    )
+                else:
+                    error_text = await response.text()
+                    return AIResponse(
+                        success=False,
+                        response="",
+                        error=f"HTTP {response.status}: {error_text}",
+                        provider=self.name
+                    )
         
         except Exception as e:
             return AIResponse(
@@ -597,6 +722,9 @@ class xAIProvider(AIProvider):
 class OllamaProvider(AIProvider):
     """Ollama Local LLM Provider - Fully Offline AI Analysis"""
     
+    # Small local models often ignore the batched JSON-array format
+    follows_batch_format = False
+    
     def __init__(self, api_key: str = "", model_name: str = "qwen2.5-coder:7b", base_url: str = "http://localhost:11434"):
         """
         Initialize Ollama provider for local LLM inference.
@@ -610,6 +738,7 @@ class OllamaProvider(AIProvider):
         self.model_name = model_name
         self.base_url = base_url.rstrip('/')
         self.api_url = f"{self.base_url}/api/chat"
+        self.models_url = f"{self.base_url}/api/tags"
         self.headers = {
             "Content-Type": "application/json"
         }
@@ -624,19 +753,18 @@ class OllamaProvider(AIProvider):
         # Can be overridden based on model size
         return 4096
     
-    def test_connection(self) -> bool:
+    async def test_connection(self) -> bool:
         """Test if Ollama daemon is running and model is available"""
         try:
             # First, check if Ollama is running
-            tags_url = f"{self.base_url}/api/tags"
-            response = requests.get(tags_url, timeout=5)
-            
-            if response.status_code != 200:
-                logger.warning(f"Ollama daemon not responding: HTTP {response.status_code}")
-                return False
-            
-            # Check if configured model exists
-            data = response.json()
+            session = await self._get_session()
+            async with session.get(self.models_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status != 200:
+                    logger.warning(f"Ollama daemon not responding: HTTP {response.status}")
+                    return False
+                
+                # Check if configured model exists
+                data = await response.json()
             models = data.get("models", [])
             
             # Model names in Ollama API response have format "name:tag"
@@ -656,7 +784,7 @@ class OllamaProvider(AIProvider):
             logger.info(f"✅ Ollama provider ready with model '{self.model_name}'")
             return True
             
-        except requests.exceptions.ConnectionError:
+        except aiohttp.ClientConnectorError:
             logger.warning(
                 "Ollama daemon not running. Start with: ollama serve"
             )
@@ -693,47 +821,47 @@ class OllamaProvider(AIProvider):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=120)  # Local LLM may be slower
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        response_time = time.time() - start_time
-                        
-                        # Extract response from Ollama format
-                        response_text = data.get("message", {}).get("content", "")
-                        
-                        # Estimate token usage (Ollama doesn't report exact tokens)
-                        eval_count = data.get("eval_count", 0)
-                        prompt_eval_count = data.get("prompt_eval_count", 0)
-                        tokens_used = eval_count + prompt_eval_count if eval_count else len(response_text) // 4
-                        
-                        return AIResponse(
-                            success=True,
-                            response=response_text,
-                            provider=self.name,
-                            tokens_used=tokens_used,
-                            response_time=response_time
-                        )
+            session = await self._get_session()
+            async with session.post(
+                self.api_url,
+                headers=self.headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=120)  # Local LLM may be slower
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    response_time = time.time() - start_time
+                    
+                    # Extract response from Ollama format
+                    response_text = data.get("message", {}).get("content", "")
+                    
+                    # Estimate token usage (Ollama doesn't report exact tokens)
+                    eval_count = data.get("eval_count", 0)
+                    prompt_eval_count = data.get("prompt_eval_count", 0)
+                    tokens_used = eval_count + prompt_eval_count if eval_count else len(response_text) // 4
+                    
+                    return AIResponse(
+                        success=True,
+                        response=response_text,
+                        provider=self.name,
+                        tokens_used=tokens_used,
+                        response_time=response_time
+                    )
+                else:
+                    error_text = await response.text()
+                    
+                    # Parse Ollama-specific errors
+                    if "model" in error_text.lower() and "not found" in error_text.lower():
+                        error_msg = f"Model '{self.model_name}' not found. Run: ollama pull {self.model_name}"
                     else:
-                        error_text = await response.text()
-                        
-                        # Parse Ollama-specific errors
-                        if "model" in error_text.lower() and "not found" in error_text.lower():
-                            error_msg = f"Model '{self.model_name}' not found. Run: ollama pull {self.model_name}"
-                        else:
-                            error_msg = f"HTTP {response.status}: {error_text[:200]}"
-                        
-                        return AIResponse(
-                            success=False,
-                            response="",
-                            error=error_msg,
-                            provider=self.name
-                        )
+                        error_msg = f"HTTP {response.status}: {error_text[:200]}"
+                    
+                    return AIResponse(
+                        success=False,
+                        response="",
+                        error=error_msg,
+                        provider=self.name
+                    )
         
         except asyncio.TimeoutError:
             return AIResponse(
@@ -765,6 +893,7 @@ class MultiAgentAI:
         self.active_providers: List[AIProvider] = []
         self.chunk_size_mb = 5  # Process 5MB chunks
         self.max_packets_per_chunk = 5000  # Max packets per chunk
+        self.chunk_batch_size = max(1, int(os.getenv("CHUNK_BATCH_SIZE", "1")))  # Chunks per LLM request (opt-in)
         
         # Weighted load balancing configuration
         self.use_weighted_balancing = os.getenv("USE_WEIGHTED_BALANCING", "true").lower() == "true"
@@ -776,12 +905,33 @@ class MultiAgentAI:
             "xAI": float(os.getenv("XAI_WEIGHT", "25"))
         }
         self.provider_usage_count = {}  # Track actual usage for self-balancing
+        self.total_provider_queries = 0  # Running sum of provider_usage_count
+        self._response_cache: "OrderedDict[str, AIResponse]" = OrderedDict()  # LRU of chunk answers
+        self._inflight: Dict[str, int] = {}  # Queries currently awaiting each provider
+        self._ewma_latency: Dict[str, float] = {}  # Smoothed response time of each provider
+        self._last_warm = 0.0  # time.monotonic() of the last connection warm-up
         
         # Initialize providers from environment variables
         self._initialize_providers()
         
-        # Test provider connections
+        # Size each provider's connection pool for the chunk fan-out of a single query
+        pool_per_host = int(os.getenv("AIOHTTP_POOL_PER_HOST", "0")) or max(8, self.max_packets_per_chunk // 500)
+        # Per-provider cap on concurrent queries; a local Ollama serves few requests at once
+        concurrency = {
+            "Groq": int(os.getenv("GROQ_CONCURRENCY", "8")),
+            "OpenAI": int(os.getenv("OPENAI_CONCURRENCY", "8")),
+            "Google Gemini": int(os.getenv("GEMINI_CONCURRENCY", "8")),
+            "Anthropic": int(os.getenv("ANTHROPIC_CONCURRENCY", "8")),
+            "xAI": int(os.getenv("XAI_CONCURRENCY", "8")),
+            "Ollama (Local)": int(os.getenv("OLLAMA_CONCURRENCY", "2"))
+        }
+        for provider in self.providers:
+            provider.pool_per_host = pool_per_host
+            provider.max_concurrency = concurrency.get(provider.name, provider.max_concurrency)
+        
+        # Test provider connections (which also leaves them warm)
         self._test_providers()
+        self._last_warm = time.monotonic()
         
         logger.info(f"Initialized {len(self.active_providers)} active AI providers")
     
@@ -831,19 +981,19 @@ class MultiAgentAI:
         """Test provider connections and populate active providers"""
         self.active_providers = []
         
-        with ThreadPoolExecutor(max_workers=len(self.providers)) as executor:
-            futures = {executor.submit(provider.test_connection): provider for provider in self.providers}
-            
-            for future in futures:
-                provider = futures[future]
-                try:
-                    if future.result():
-                        self.active_providers.append(provider)
-                        logger.info(f"✅ {provider.name} provider is active")
-                    else:
-                        logger.warning(f"❌ {provider.name} provider connection failed")
-                except Exception as e:
-                    logger.warning(f"❌ {provider.name} provider test failed: {e}")
+        try:
+            results = run_sync(self._atest_providers(), timeout=PROVIDER_TEST_TIMEOUT) if self.providers else []
+        except concurrent.futures.TimeoutError:
+            logger.warning(f"Provider connection tests did not finish within {PROVIDER_TEST_TIMEOUT:.0f}s")
+            results = [TimeoutError("connection test timed out")] * len(self.providers)
+        for provider, result in zip(self.providers, results):
+            if isinstance(result, Exception):
+                logger.warning(f"❌ {provider.name} provider test failed: {result}")
+            elif result:
+                self.active_providers.append(provider)
+                logger.info(f"✅ {provider.name} provider is active")
+            else:
+                logger.warning(f"❌ {provider.name} provider connection failed")
         
         # Shuffle active providers to distribute load evenly
         # This prevents always using Groq first for single-chunk queries
@@ -859,138 +1009,195 @@ class MultiAgentAI:
                                      for p in self.active_providers])
             logger.info(f"🎯 Weighted balancing enabled: {weights_str}")
     
+    async def _atest_providers(self) -> List[Any]:
+        """Run every provider's connection test concurrently on one event loop"""
+        results = await asyncio.gather(
+            *(provider.test_connection() for provider in self.providers), return_exceptions=True
+        )
+        # Active providers keep their now-warm sessions for the first query
+        await asyncio.gather(
+            *(provider.aclose() for provider, result in zip(self.providers, results) if result is not True),
+            return_exceptions=True
+        )
+        return results
+    
+    def prewarm(self) -> None:
+        """Refresh active providers' connections in the background, at most once per PREWARM_INTERVAL"""
+        now = time.monotonic()
+        if not self.active_providers or now - self._last_warm < PREWARM_INTERVAL:
+            return
+        self._last_warm = now
+        asyncio.run_coroutine_threadsafe(self._awarm(), _background_loop())
+    
+    async def _awarm(self) -> None:
+        await asyncio.gather(*(provider.warm() for provider in self.active_providers), return_exceptions=True)
+    
+    async def aclose(self) -> None:
+        """Close the HTTP sessions of all providers (call before closing their event loop)"""
+        await asyncio.gather(*(provider.aclose() for provider in self.providers), return_exceptions=True)
+    
     def chunk_packets(self, packets: List[Packet]) -> List[PacketChunk]:
         """Split packets into manageable chunks for processing"""
         if not packets:
             return []
         
-        chunks = []
-        total_packets = len(packets)
-        
-        # Calculate chunk size based on both packet count and estimated size
-        estimated_size_mb = (len(packets) * 1500) / (1024 * 1024)  # Rough estimate
-        
-        if estimated_size_mb <= self.chunk_size_mb and total_packets <= self.max_packets_per_chunk:
-            # Small file, process as single chunk
-            chunk_id = hashlib.md5(f"chunk_0_{total_packets}".encode()).hexdigest()[:8]
-            summary = self._extract_chunk_statistics(packets)
-            
-            chunks.append(PacketChunk(
-                chunk_id=chunk_id,
-                packets=packets,
-                summary=summary,
-                size_mb=estimated_size_mb,
-                packet_count=total_packets
-            ))
-        else:
-            # Large file, split into chunks
-            chunk_count = max(
-                math.ceil(estimated_size_mb / self.chunk_size_mb),
-                math.ceil(total_packets / self.max_packets_per_chunk)
-            )
-            
-            packets_per_chunk = math.ceil(total_packets / chunk_count)
-            
-            for i in range(chunk_count):
-                start_idx = i * packets_per_chunk
-                end_idx = min((i + 1) * packets_per_chunk, total_packets)
-                chunk_packets = packets[start_idx:end_idx]
-                
-                if not chunk_packets:
-                    continue
-                
-                chunk_id = hashlib.md5(f"chunk_{i}_{len(chunk_packets)}".encode()).hexdigest()[:8]
-                summary = self._extract_chunk_statistics(chunk_packets)
-                chunk_size = (len(chunk_packets) * 1500) / (1024 * 1024)
-                
-                chunks.append(PacketChunk(
-                    chunk_id=chunk_id,
-                    packets=chunk_packets,
-                    summary=summary,
-                    size_mb=chunk_size,
-                    packet_count=len(chunk_packets)
-                ))
+        packet_sizes, bounds = self._chunk_bounds(packets)
+        summaries = self._chunk_summaries(packets, packet_sizes, bounds)
+        chunks = [
+            self._build_chunk(i, packets, packet_sizes, bounds[i], summary)
+            for i, summary in enumerate(summaries)
+        ]
         
-        logger.info(f"Split {total_packets} packets into {len(chunks)} chunks")
+        logger.info(f"Split {len(packets)} packets into {len(chunks)} chunks")
         return chunks
     
-    def _extract_chunk_statistics(self, packets: List[Packet]) -> Dict[str, Any]:
-        """Extract statistics from a packet chunk"""
+    async def iter_chunks(self, packets: List[Packet]) -> AsyncIterator[PacketChunk]:
+        """Yield packet chunks as soon as each one's statistics are ready"""
         if not packets:
-            return {}
+            return
+        
+        # The loop is shared by every session, so even sizing the capture runs off it
+        loop = asyncio.get_running_loop()
+        packet_sizes, bounds = await loop.run_in_executor(None, self._chunk_bounds, packets)
+        
+        # Extraction runs off the event loop so queries for earlier chunks progress meanwhile.
+        # A bounded window of chunks is in flight at once: enough to keep the pool's workers and
+        # every provider busy, without holding all of a large capture's frame copies at once.
+        workers = min(os.cpu_count() or 1, 8, len(bounds))
+        lookahead = max(2 * len(self.active_providers), workers, 1)
+        pool = None
+        if len(packets) >= PARALLEL_STATS_MIN_PACKETS and workers > 1 and lookahead > 1:
+            pool = process_pool(workers)
+        
+        use_pool = pool is not None
+        
+        async def statistics(start: int, end: int) -> Dict[str, Any]:
+            nonlocal use_pool
+            if use_pool:
+                try:
+                    job = await loop.run_in_executor(None, self._frame_job, packets, packet_sizes, start, end)
+                    return await asyncio.wait_for(
+                        loop.run_in_executor(pool, chunk_statistics_from_frames, job), POOL_JOB_TIMEOUT
+                    )
+                except Exception as e:
+                    # Only stop submitting: jobs already queued belong to other chunks' tasks,
+                    # and cancelling them here would abort those tasks rather than fall back
+                    if use_pool:
+                        logger.warning(f"Parallel chunk statistics failed, computing in-process: {e}")
+                        use_pool = False
+            return await loop.run_in_executor(
+                None, self._range_statistics, packets, packet_sizes, start, end
+            )
         
-        stats = {
-            "total_packets": len(packets),
-            "protocols": {},
-            "src_ips": {},
-            "dst_ips": {},
-            "ports": {"tcp": [], "udp": []},
-            "suspicious_patterns": [],
-            "packet_sizes": []
-        }
+        window: "deque[asyncio.Task]" = deque()
+        upcoming = iter(bounds)
+        try:
+            for i, bound in enumerate(bounds):
+                while len(window) < lookahead:
+                    next_bound = next(upcoming, None)
+                    if next_bound is None:
+                        break
+                    window.append(asyncio.ensure_future(statistics(*next_bound)))
+                summary = await window.popleft()
+                yield self._build_chunk(i, packets, packet_sizes, bound, summary)
+        finally:
+            # A consumer that stops early should not leave extraction running
+            for task in window:
+                task.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        
+        logger.info(f"Split {len(packets)} packets into {len(bounds)} chunks")
+    
+    def _chunk_bounds(self, packets: List[Packet]) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        """Measure packet sizes once and work out the (start, end) index range of each chunk"""
+        total_packets = len(packets)
         
-        syn_counts = {}
+        # Exact packet sizes, measured once; chunks reuse zero-copy slices of the array
+        packet_sizes = np.fromiter((packet_length(pkt) for pkt in packets), dtype=np.int64, count=total_packets)
+        total_size_mb = int(packet_sizes.sum()) / (1024 * 1024)
         
-        for pkt in packets:
-            # Packet size
-            stats["packet_sizes"].append(len(pkt))
-            
-            # IP layer analysis
-            if IP in pkt:
-                src_ip = pkt[IP].src
-                dst_ip = pkt[IP].dst
-                proto_num = pkt[IP].proto
-                
-                # Count IPs
-                stats["src_ips"][src_ip] = stats["src_ips"].get(src_ip, 0) + 1
-                stats["dst_ips"][dst_ip] = stats["dst_ips"].get(dst_ip, 0) + 1
-                
-                # Protocol analysis
-                if proto_num == 6:  # TCP
-                    stats["protocols"]["TCP"] = stats["protocols"].get("TCP", 0) + 1
-                    if TCP in pkt:
-                        port = pkt[TCP].dport
-                        stats["ports"]["tcp"].append(port)
-                        
-                        # Check for SYN flood
-                        if pkt[TCP].flags & 0x02:  # SYN flag
-                            syn_counts[src_ip] = syn_counts.get(src_ip, 0) + 1
-                            if syn_counts[src_ip] > 50:
-                                stats["suspicious_patterns"].append(f"Potential SYN flood from {src_ip}")
-                        
-                        # Check for suspicious ports
-                        if port in [0, 65535, 31337, 6667]:
-                            stats["suspicious_patterns"].append(f"Suspicious TCP port {port} from {src_ip}")
-                
-                elif proto_num == 17:  # UDP
-                    stats["protocols"]["UDP"] = stats["protocols"].get("UDP", 0) + 1
-                    if UDP in pkt:
-                        port = pkt[UDP].dport
-                        stats["ports"]["udp"].append(port)
-                        
-                        # Check for suspicious ports
-                        if port in [0, 65535, 31337]:
-                            stats["suspicious_patterns"].append(f"Suspicious UDP port {port} from {src_ip}")
-                
-                elif proto_num == 1:  # ICMP
-                    stats["protocols"]["ICMP"] = stats["protocols"].get("ICMP", 0) + 1
-                else:
-                    stats["protocols"]["Other"] = stats["protocols"].get("Other", 0) + 1
+        if total_size_mb <= self.chunk_size_mb and total_packets <= self.max_packets_per_chunk:
+            # Small file, process as single chunk
+            return packet_sizes, [(0, total_packets)]
+        
+        # Large file, split into chunks
+        chunk_count = max(
+            math.ceil(total_size_mb / self.chunk_size_mb),
+            math.ceil(total_packets / self.max_packets_per_chunk)
+        )
         
-        # Remove duplicates from suspicious patterns
-        stats["suspicious_patterns"] = list(set(stats["suspicious_patterns"]))
+        packets_per_chunk = math.ceil(total_packets / chunk_count)
+        bounds = [
+            (start_idx, min(start_idx + packets_per_chunk, total_packets))
+            for start_idx in range(0, total_packets, packets_per_chunk)
+        ]
+        return packet_sizes, bounds
+    
+    def _build_chunk(self, index: int, packets: List[Packet], packet_sizes: np.ndarray,
+                     bound: Tuple[int, int], summary: Dict[str, Any]) -> PacketChunk:
+        """Wrap one (start, end) range and its statistics in a PacketChunk without copying packets"""
+        start_idx, end_idx = bound
+        
+        # Position-based id: the md5 of "chunk_<i>_<len>" added nothing but hashing cost
+        return PacketChunk(
+            chunk_id=f"c{index:05x}",
+            source=packets,
+            start=start_idx,
+            end=end_idx,
+            summary=summary,
+            size_mb=int(packet_sizes[start_idx:end_idx].sum()) / (1024 * 1024),
+            packet_count=end_idx - start_idx
+        )
+    
+    def _chunk_summaries(self, packets: List[Packet], packet_sizes: np.ndarray,
+                         bounds: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """Statistics for each (start, end) slice, on a process pool for large captures"""
+        workers = min(os.cpu_count() or 1, 8, len(bounds))
+        if len(packets) >= PARALLEL_STATS_MIN_PACKETS and workers > 1:
+            try:
+                jobs = [self._frame_job(packets, packet_sizes, start, end) for start, end in bounds]
+                return pool_map(chunk_statistics_from_frames, jobs, workers)
+            except Exception as e:
+                logger.warning(f"Parallel chunk statistics failed, computing in-process: {e}")
+        return [self._range_statistics(packets, packet_sizes, start, end) for start, end in bounds]
+    
+    @staticmethod
+    def _frame_job(packets: List[Packet], packet_sizes: np.ndarray, start: int, end: int) -> Tuple[list, np.ndarray]:
+        """Package a slice for a stats worker; scapy packets pickle poorly, so ship raw bytes instead"""
+        frames = [(pkt.__class__, pkt.original or bytes(pkt)) for pkt in map(packets.__getitem__, range(start, end))]
+        return frames, packet_sizes[start:end]
+    
+    @staticmethod
+    def _range_statistics(packets: List[Packet], packet_sizes: np.ndarray, start: int, end: int) -> Dict[str, Any]:
+        """Statistics of packets[start:end], walked by index instead of copying that part of the list"""
+        if start >= end:
+            return {}
+        # packet_sizes is an array, so its slice is a view rather than a copy
+        chunk = map(packets.__getitem__, range(start, end))
+        return chunk_statistics(packet_fields(chunk), end - start, packet_sizes[start:end])
+    
+    def _extract_chunk_statistics(self, packets: List[Packet], packet_sizes: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+        """Extract statistics from a packet chunk, reusing packet sizes when already known"""
+        if not packets:
+            return {}
         
-        return stats
+        if packet_sizes is None:
+            packet_sizes = [packet_length(pkt) for pkt in packets]
+        return chunk_statistics(packet_fields(packets), len(packets), packet_sizes)
     
     def _select_provider(self, chunk: Optional[PacketChunk] = None, exclude: Optional[set] = None) -> Optional[AIProvider]:
         """
-        Select the best available provider using weighted probability or round-robin.
+        Select the best available provider using weighted probability or least outstanding requests.
         
         Weighted balancing uses a self-correcting algorithm that:
         1. Calculates target usage percentage for each provider
         2. Compares actual usage to target
         3. Prioritizes providers that are underused
         4. Falls back to configured weights for new sessions
+        
+        Without weights, the provider with the lowest (in-flight queries + 1) x
+        smoothed latency wins, ties going to the one with fewer in-flight queries.
         """
         if not self.active_providers:
             return None
@@ -1005,68 +1212,178 @@ class MultiAgentAI:
 
         # Use weighted balancing if enabled
         if self.use_weighted_balancing:
-            total_queries = sum(self.provider_usage_count.values())
+            total_queries = self.total_provider_queries
             
             if total_queries == 0:
                 # First query: use weighted random selection
                 weights = [self.provider_weights.get(p.name, 33) for p in candidates]
                 provider = random.choices(candidates, weights=weights, k=1)[0]
             else:
-                # Self-balancing: prioritize underused providers
-                scores = []
-                for provider in candidates:
-                    target_weight = self.provider_weights.get(provider.name, 33)
-                    actual_usage = self.provider_usage_count.get(provider.name, 0)
-                    actual_percentage = (actual_usage / total_queries) * 100 if total_queries > 0 else 0
-                    
-                    # Score = how much below target (higher = more underused)
-                    # Add small random factor to break ties
-                    score = (target_weight - actual_percentage) + random.uniform(0, 5)
-                    scores.append(score)
-                
-                # Select provider with highest score (most underused)
-                max_score_idx = scores.index(max(scores))
-                provider = candidates[max_score_idx]
+                # Self-balancing: pick the provider furthest below its target share.
+                # Score = target% - actual%, plus a small random factor to break ties
+                weights = self.provider_weights
+                usage = self.provider_usage_count
+                scale = 100 / total_queries
+                provider = max(
+                    candidates,
+                    key=lambda p: weights.get(p.name, 33) - usage.get(p.name, 0) * scale + random.uniform(0, 5),
+                )
         else:
-            # Simple round-robin fallback
-            provider = candidates[0]
-            # Rotate only if we're using the full active list
-            if not exclude:
-                self.active_providers.append(self.active_providers.pop(0))
+            # Latency-weighted least outstanding requests: expected wait is queue depth times
+            # smoothed latency, so a slow provider stops receiving an equal share of a burst.
+            # Providers without a measurement yet score 0 and get tried first; failures
+            # count as FAILURE_LATENCY_PENALTY, so a failing provider drops to the back.
+            inflight = self._inflight
+            latency = self._ewma_latency
+            provider = min(
+                candidates,
+                key=lambda p: ((inflight.get(p.name, 0) + 1) * latency.get(p.name, 0.0), inflight.get(p.name, 0)),
+            )
         
         # Track usage
         self.provider_usage_count[provider.name] = self.provider_usage_count.get(provider.name, 0) + 1
+        self.total_provider_queries += 1
         
         return provider
     
+    def _record_latency(self, provider_name: str, response_time: float) -> None:
+        """Fold a response time (or a failure's penalty) into the provider's moving average"""
+        previous = self._ewma_latency.get(provider_name)
+        if previous is None:
+            self._ewma_latency[provider_name] = response_time
+        else:
+            self._ewma_latency[provider_name] = previous + LATENCY_EWMA_ALPHA * (response_time - previous)
+    
     async def query_single_chunk(self, prompt: str, chunk: PacketChunk) -> AIResponse:
         """Query AI for a single packet chunk with failover across providers"""
         # Prepare context once per chunk
         context = self._format_chunk_context(chunk)
 
-        tried: set = set()
+        # Same question about the same chunk statistics: answer from the cache
+        cache_key = self._cache_key(prompt, context)
+        cached = self._cached_response(cache_key, chunk.chunk_id)
+        if cached is not None:
+            return cached
+
+        response = await self._query_with_failover(prompt, context, chunk.chunk_id)
+        if response.success and response.response:
+            self._cache_response(cache_key, response)
+        return response
+    
+    async def query_chunk_batch(self, prompt: str, chunks: List[PacketChunk]) -> List[AIResponse]:
+        """Query several chunks in one request, asking for one analysis per chunk"""
+        contexts = [self._format_chunk_context(chunk) for chunk in chunks]
+        cache_keys = [self._cache_key(prompt, context) for context in contexts]
+        results: List[Optional[AIResponse]] = [
+            self._cached_response(key, chunk.chunk_id) for key, chunk in zip(cache_keys, chunks)
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        # Batched prompts only go to providers known to keep the requested format
+        unbatched = {p.name for p in self.active_providers if not p.follows_batch_format}
+        
+        if len(pending) == 1 or len(unbatched) == len(self.active_providers):
+            singles = await asyncio.gather(*(self.query_single_chunk(prompt, chunks[i]) for i in pending))
+            for i, single in zip(pending, singles):
+                results[i] = single
+        elif pending:
+            batch_prompt = (
+                f"{prompt}\n\nAnalyze each of the {len(pending)} packet chunks above separately. "
+                f"Respond only with a JSON array of exactly {len(pending)} strings, "
+                "one analysis per chunk, in the order the chunks are given."
+            )
+            batch_context = "\n".join(contexts[i] for i in pending)
+            batch_id = ",".join(chunks[i].chunk_id for i in pending)
+            response = await self._query_with_failover(batch_prompt, batch_context, batch_id, exclude=unbatched)
+            
+            analyses = self._split_batch_response(response.response, len(pending)) if response.success else None
+            if not response.success:
+                for i in pending:
+                    results[i] = replace(response, chunk_id=chunks[i].chunk_id)
+            elif analyses is None:
+                # The model ignored the requested format: fall back to one request per chunk
+                logger.warning(f"Batched answer for chunks {batch_id} was not a {len(pending)}-item JSON array; querying them one by one")
+                singles = await asyncio.gather(*(self.query_single_chunk(prompt, chunks[i]) for i in pending))
+                for i, single in zip(pending, singles):
+                    results[i] = single
+            else:
+                # Time and tokens belong to the one request; count them once
+                for n, (i, analysis) in enumerate(zip(pending, analyses)):
+                    results[i] = replace(
+                        response,
+                        response=analysis,
+                        chunk_id=chunks[i].chunk_id,
+                        response_time=response.response_time if n == 0 else 0.0,
+                        tokens_used=response.tokens_used if n == 0 else None,
+                    )
+                    if analysis:
+                        self._cache_response(cache_keys[i], results[i])
+        
+        return results
+    
+    @staticmethod
+    def _split_batch_response(text: str, count: int) -> Optional[List[str]]:
+        """Parse a batched answer into per-chunk analyses, or None if it is not a count-item JSON array"""
+        start, end = text.find("["), text.rfind("]")
+        if start < 0 or end <= start:
+            return None
+        try:
+            items = json.loads(text[start:end + 1])
+        except ValueError:
+            return None
+        if not isinstance(items, list) or len(items) != count:
+            return None
+        return [item if isinstance(item, str) else json.dumps(item, indent=2) for item in items]
+    
+    @staticmethod
+    def _cache_key(prompt: str, context: str) -> str:
+        return hashlib.sha1(f"{prompt}\0{context}".encode()).hexdigest()
+    
+    def _cached_response(self, cache_key: str, chunk_id: str) -> Optional[AIResponse]:
+        """Cached answer relabelled for this chunk, or None"""
+        cached = self._response_cache.get(cache_key)
+        if cached is None:
+            return None
+        self._response_cache.move_to_end(cache_key)
+        # Nothing was spent on a cache hit, so it adds no time or tokens to the totals
+        return replace(cached, response_time=0.0, tokens_used=None, chunk_id=chunk_id)
+    
+    def _cache_response(self, cache_key: str, response: AIResponse) -> None:
+        self._response_cache[cache_key] = response
+        if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    async def _query_with_failover(self, prompt: str, context: str, chunk_id: str,
+                                   exclude: Optional[set] = None) -> AIResponse:
+        """Send one prompt + context to the selected provider, failing over on errors"""
+        tried: set = set(exclude or ())
         errors: List[str] = []
         max_attempts = min(len(self.active_providers), 3)  # avoid long cascades
 
         for _ in range(max_attempts):
-            provider = self._select_provider(chunk, exclude=tried)
+            provider = self._select_provider(exclude=tried)
             if not provider:
                 break
 
+            self._inflight[provider.name] = self._inflight.get(provider.name, 0) + 1
             try:
-                response = await provider.query(prompt, context)
+                async with provider.query_slots():
+                    response = await provider.query(prompt, context)
             except Exception as e:
                 # Normalize exception into AIResponse-like failure
                 response = AIResponse(success=False, response="", error=str(e), provider=provider.name)
+            finally:
+                self._inflight[provider.name] -= 1
 
             # Ensure provider and chunk metadata
             response.provider = response.provider or provider.name
-            response.chunk_id = chunk.chunk_id
+            response.chunk_id = chunk_id
 
             if response.success and response.response:
+                self._record_latency(provider.name, response.response_time)
                 return response
 
-            # On failure, collect error and try next provider
+            # On failure, penalize the provider's latency, collect the error and try the next one
+            self._record_latency(provider.name, FAILURE_LATENCY_PENALTY)
             err_text = response.error or "Unknown error"
             errors.append(f"{provider.name}: {err_text}")
             tried.add(provider.name)
@@ -1081,88 +1398,116 @@ class MultiAgentAI:
             success=False,
             response="",
             error="; ".join(errors) if errors else "All providers failed",
-            chunk_id=chunk.chunk_id
+            chunk_id=chunk_id
         )
     
     def _format_chunk_context(self, chunk: PacketChunk) -> str:
         """Format chunk statistics as context for AI"""
         stats = chunk.summary
         
-        context = f"""
+        parts = [f"""
 PACKET CHUNK ANALYSIS (ID: {chunk.chunk_id})
 =========================================
 
 Basic Statistics:
 - Total Packets: {stats.get('total_packets', 0)}
 - Chunk Size: {chunk.size_mb:.2f} MB
-- Average Packet Size: {sum(stats.get('packet_sizes', [0])) / len(stats.get('packet_sizes', [1])):.1f} bytes
+- Average Packet Size: {stats.get('size_sum', 0) / max(stats.get('size_count', 0), 1):.1f} bytes
 
 Protocol Distribution:
-"""
+"""]
         
-        for protocol, count in stats.get('protocols', {}).items():
-            context += f"- {protocol}: {count} packets\n"
+        parts.extend(f"- {protocol}: {count} packets\n" for protocol, count in stats.get('protocols', {}).items())
         
-        context += "\nTop Source IPs:\n"
-        top_src_ips = sorted(stats.get('src_ips', {}).items(), key=lambda x: x[1], reverse=True)[:5]
-        for ip, count in top_src_ips:
-            context += f"- {ip}: {count} packets\n"
+        parts.append("\nTop Source IPs:\n")
+        top_src_ips = heapq.nlargest(5, stats.get('src_ips', {}).items(), key=itemgetter(1))
+        parts.extend(f"- {ip}: {count} packets\n" for ip, count in top_src_ips)
         
-        context += "\nTop Destination IPs:\n"
-        top_dst_ips = sorted(stats.get('dst_ips', {}).items(), key=lambda x: x[1], reverse=True)[:5]
-        for ip, count in top_dst_ips:
-            context += f"- {ip}: {count} packets\n"
+        parts.append("\nTop Destination IPs:\n")
+        top_dst_ips = heapq.nlargest(5, stats.get('dst_ips', {}).items(), key=itemgetter(1))
+        parts.extend(f"- {ip}: {count} packets\n" for ip, count in top_dst_ips)
         
         if stats.get('suspicious_patterns'):
-            context += "\nSuspicious Patterns Detected:\n"
-            for pattern in stats.get('suspicious_patterns', [])[:10]:  # Limit to 10
-                context += f"- {pattern}\n"
+            parts.append("\nSuspicious Patterns Detected:\n")
+            parts.extend(f"- {pattern}\n" for pattern in stats['suspicious_patterns'][:10])  # Limit to 10
+        
+        return "".join(parts)
+    
+    async def query(self, prompt: str, packets: List[Packet],
+                    on_response: Optional[Callable[[AIResponse], None]] = None) -> List[AIResponse]:
+        """
+        Query AI system with automatic chunking for large files.
         
-        return context
+        on_response, if given, is called with each chunk's response as soon as it
+        arrives (on the AI event loop's thread), before all chunks are done.
+        """
+        responses = []
+        async for response in self.iter_query(prompt, packets):
+            responses.append(response)
+            if on_response is not None:
+                on_response(response)
+        # Back to chunk order; ids are fixed-width hex indexes, so they sort positionally
+        responses.sort(key=lambda response: response.chunk_id or "")
+        return responses
     
-    async def query(self, prompt: str, packets: List[Packet]) -> List[AIResponse]:
-        """Query AI system with automatic chunking for large files"""
+    async def iter_query(self, prompt: str, packets: List[Packet]) -> AsyncIterator[AIResponse]:
+        """Yield each chunk's response as soon as it completes, fastest first"""
         if not self.active_providers:
-            return [AIResponse(
+            yield AIResponse(
                 success=False,
                 response="",
                 error="No active AI providers available"
-            )]
-        
-        # Split into chunks
-        chunks = self.chunk_packets(packets)
+            )
+            return
         
-        if not chunks:
-            return [AIResponse(
+        # Start querying each batch of chunks as soon as its statistics are extracted
+        tasks = []
+        batch: List[PacketChunk] = []
+        chunk_count = 0
+        async for chunk in self.iter_chunks(packets):
+            batch.append(chunk)
+            chunk_count += 1
+            if len(batch) >= self.chunk_batch_size:
+                tasks.append(asyncio.create_task(self._query_batch_safely(prompt, batch)))
+                batch = []
+        if batch:
+            tasks.append(asyncio.create_task(self._query_batch_safely(prompt, batch)))
+        
+        if not tasks:
+            yield AIResponse(
                 success=False,
                 response="",
                 error="No valid packet data to analyze"
-            )]
-        
-        logger.info(f"Processing {len(chunks)} chunks with {len(self.active_providers)} providers")
-        
-        # Process chunks concurrently
-        tasks = []
-        for chunk in chunks:
-            tasks.append(self.query_single_chunk(prompt, chunk))
+            )
+            return
         
-        # Execute all queries
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(f"Processing {chunk_count} chunks in {len(tasks)} requests with {len(self.active_providers)} providers")
         
-        # Handle exceptions
-        final_responses = []
-        for i, response in enumerate(responses):
-            if isinstance(response, Exception):
-                final_responses.append(AIResponse(
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for response in await next_done:
+                    yield response
+        finally:
+            # A consumer that stops early should not leave queries running
+            for task in tasks:
+                task.cancel()
+    
+    async def _query_batch_safely(self, prompt: str, chunks: List[PacketChunk]) -> List[AIResponse]:
+        """query_chunk_batch with any unexpected exception turned into failed responses"""
+        try:
+            if len(chunks) == 1:
+                return [await self.query_single_chunk(prompt, chunks[0])]
+            return await self.query_chunk_batch(prompt, chunks)
+        except Exception as e:
+            return [
+                AIResponse(
                     success=False,
                     response="",
-                    error=str(response),
-                    chunk_id=chunks[i].chunk_id if i < len(chunks) else None
-                ))
-            else:
-                final_responses.append(response)
-        
-        return final_responses
+                    error=str(e),
+                    chunk_id=chunk.chunk_id
+                )
+                for chunk in chunks
+            ]
     
     async def query_with_explicit_provider(self, prompt: str, packets: List[Packet], provider_name: str) -> List[AIResponse]:
         """
@@ -1195,8 +1540,31 @@ Protocol Distribution:
         
         logger.info(f"Explicit provider mode: Using only '{provider_name}'")
         
-        # Split into chunks (same logic as normal query)
-        chunks = self.chunk_packets(packets)
+        async def query_single_provider(p, pr, ctx, ch):
+            """Query single provider without failover"""
+            try:
+                async with p.query_slots():
+                    response = await p.query(pr, ctx)
+                response.chunk_id = ch.chunk_id
+                response.provider = response.provider or p.name
+                return response
+            except Exception as e:
+                return AIResponse(
+                    success=False,
+                    response="",
+                    error=str(e),
+                    provider=p.name,
+                    chunk_id=ch.chunk_id
+                )
+        
+        # Split into chunks (same logic as normal query); extraction runs off the shared
+        # event loop, and each chunk is queried with the selected provider (NO FAILOVER)
+        chunks: List[PacketChunk] = []
+        tasks = []
+        async for chunk in self.iter_chunks(packets):
+            chunks.append(chunk)
+            context = self._format_chunk_context(chunk)
+            tasks.append(asyncio.create_task(query_single_provider(selected_provider, prompt, context, chunk)))
         
         if not chunks:
             return [AIResponse(
@@ -1207,29 +1575,6 @@ Protocol Distribution:
         
         logger.info(f"Processing {len(chunks)} chunks with explicit provider: {provider_name}")
         
-        # Process all chunks with the selected provider (NO FAILOVER)
-        tasks = []
-        for chunk in chunks:
-            context = self._format_chunk_context(chunk)
-            
-            async def query_single_provider(p, pr, ctx, ch):
-                """Query single provider without failover"""
-                try:
-                    response = await p.query(pr, ctx)
-                    response.chunk_id = ch.chunk_id
-                    response.provider = response.provider or p.name
-                    return response
-                except Exception as e:
-                    return AIResponse(
-                        success=False,
-                        response="",
-                        error=str(e),
-                        provider=p.name,
-                        chunk_id=ch.chunk_id
-                    )
-            
-            tasks.append(query_single_provider(selected_provider, prompt, context, chunk))
-        
         # Execute all queries
         responses = await asyncio.gather(*tasks, return_exceptions=True)
         
@@ -1262,33 +1607,44 @@ Protocol Distribution:
         if not successful_responses:
             return "❌ Analysis failed for all chunks. Please check your AI provider connections."
         
-        combined = f"🔍 **Multi-Chunk Analysis Summary** ({len(successful_responses)}/{len(responses)} chunks analyzed successfully)\n\n"
+        # Collect the pieces and join once; repeated += copies the growing report each time
+        parts = [f"🔍 **Multi-Chunk Analysis Summary** ({len(successful_responses)}/{len(responses)} chunks analyzed successfully)\n\n"]
         
         for i, response in enumerate(successful_responses, 1):
-            combined += f"### Chunk {i} Analysis ({response.provider}):\n"
-            combined += f"{response.response}\n\n"
-            combined += "---\n\n"
+            parts.append(f"### Chunk {i} Analysis ({response.provider}):\n{response.response}\n\n---\n\n")
         
         if failed_responses:
-            combined += f"⚠️ **Note**: {len(failed_responses)} chunks failed to analyze due to errors.\n"
+            parts.append(f"⚠️ **Note**: {len(failed_responses)} chunks failed to analyze due to errors.\n")
         
         # Add performance summary
         total_time = sum(r.response_time for r in successful_responses if r.response_time)
         total_tokens = sum(r.tokens_used for r in successful_responses if r.tokens_used)
-        
-        combined += f"\n📊 **Performance Summary**:\n"
-        combined += f"- Total processing time: {total_time:.2f} seconds\n"
-        combined += f"- Total tokens used: {total_tokens}\n"
         providers_used = sorted({p for p in (r.provider for r in successful_responses) if p})
-        combined += f"- Providers used: {', '.join(providers_used)}\n"
         
-        return combined
+        parts.append(
+            f"\n📊 **Performance Summary**:\n"
+            f"- Total processing time: {total_time:.2f} seconds\n"
+            f"- Total tokens used: {total_tokens}\n"
+            f"- Providers used: {', '.join(providers_used)}\n"
+        )
+        
+        return "".join(parts)
 
 # Global instance
 multi_agent = MultiAgentAI()
 
+@atexit.register
+def _close_sessions() -> None:
+    """Close provider sessions while the background loop is still running"""
+    if _loop is not None and _loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(multi_agent.aclose(), _loop).result(timeout=5)
+        except Exception:
+            pass
+
 # Convenience functions for backward compatibility
-async def query_ai_async(prompt: str, packets: List[Packet], provider_name: Optional[str] = None) -> Dict[str, Any]:
+async def query_ai_async(prompt: str, packets: List[Packet], provider_name: Optional[str] = None,
+                         on_response: Optional[Callable[[AIResponse], None]] = None) -> Dict[str, Any]:
     """
     Async query function with provider selection support
     
@@ -1298,6 +1654,8 @@ async def query_ai_async(prompt: str, packets: List[Packet], provider_name: Opti
         provider_name: Optional provider name for explicit routing (e.g., "Ollama (Local)", "Groq")
                       If "Auto (Load Balanced)", uses regular load-balanced routing
                       If specific provider name, uses explicit provider routing (no failover)
+        on_response: Optional callback given each chunk's response as it arrives in
+                     load-balanced mode; it runs on the AI event loop's thread
     """
     # Determine routing strategy based on provider_name
     if provider_name and provider_name != "Auto (Load Balanced)":
@@ -1307,7 +1665,7 @@ async def query_ai_async(prompt: str, packets: List[Packet], provider_name: Opti
     else:
         # Auto mode - use load balancing and failover
         logger.info("Using auto load-balanced routing")
-        responses = await multi_agent.query(prompt, packets)
+        responses = await multi_agent.query(prompt, packets, on_response)
     
     combined_response = multi_agent.combine_responses(responses)
     return {
@@ -1319,20 +1677,18 @@ async def query_ai_async(prompt: str, packets: List[Packet], provider_name: Opti
 
 def query_ai(prompt: str, packets: List[Packet]) -> Dict[str, Any]:
     """Synchronous wrapper for async query"""
-    loop: Optional[asyncio.AbstractEventLoop] = None
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        return loop.run_until_complete(query_ai_async(prompt, packets))
+        return run_sync(query_ai_async(prompt, packets))
     except Exception as e:
         return {
             "success": False,
             "response": "",
             "error": str(e)
         }
-    finally:
-        if loop is not None:
-            loop.close()
+
+def prewarm_providers() -> None:
+    """Warm provider connections ahead of the next query without blocking the caller"""
+    multi_agent.prewarm()
 
 def get_active_providers() -> List[str]:
     """Get list of active provider names"""
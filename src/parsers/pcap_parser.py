@@ -3,15 +3,188 @@ Extracts timestamp, source IP, destination IP, protocol, source port, and destin
 Returns data as a pandas DataFrame.
 """
 
-from scapy.all import rdpcap
-from scapy.layers.inet import IP, TCP, UDP
+import os
+import mmap
+import inspect
+from contextlib import contextmanager
+from decimal import Decimal
+from socket import inet_ntoa
+from struct import Struct, unpack_from
+from array import array
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+import numpy as np
+from scapy.all import PcapReader, RawPcapReader
+from scapy.config import conf
+from scapy.data import MTU
+from scapy.packet import Packet
+from scapy.utils import EDecimal
+from scapy.layers.inet import IP, TCP, UDP, ICMP
+from scapy.layers.l2 import Ether
 import pandas as pd
-from src.utils.helpers import get_protocol_name
+from src.utils.helpers import ETH_HEADER_LEN, ETHERTYPE_IPV4, get_protocol_name, ipv4_header, pool_map
+
+# Read buffer for capture files; a large buffer amortizes read() syscalls on big captures
+PCAP_READ_BUFFER = int(os.getenv("PCAP_READ_BUFFER_KB", "128")) * 1024
+# Map capture files into memory instead of copying them through a read buffer
+PCAP_USE_MMAP = os.getenv("PCAP_USE_MMAP", "false").lower() == "true"
+
+# Columns of the parsed capture, in row-tuple order
+PCAP_COLUMNS = ('Timestamp', 'Source IP', 'Destination IP', 'Protocol', 'Source Port', 'Destination Port')
+
+# Link type of Ethernet frames, the common case decoded from raw bytes
+LINKTYPE_ETHERNET = 1
+
+# Classic pcap magic numbers -> (byte order, nanosecond timestamps)
+PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", False),
+    b"\xa1\xb2\xc3\xd4": (">", False),
+    b"\x4d\x3c\xb2\xa1": ("<", True),
+    b"\xa1\xb2\x3c\x4d": (">", True),
+}
+# Frame bytes decoded per record: Ethernet, the longest IPv4 header, both ports
+HEADER_WINDOW = ETH_HEADER_LEN + 60 + 4
+# Records decoded per NumPy batch, bounding the header matrix to a few MB
+VECTOR_BATCH_RECORDS = 65536
+# Captures at least this large (MB) are decoded on a process pool
+PCAP_PARALLEL_MIN_MB = float(os.getenv("PCAP_PARALLEL_MIN_MB", "10"))
+# IP protocol number -> the Protocol column's label, resolved once instead of per packet
+PROTOCOL_LABELS = tuple(
+    name if name in ('TCP', 'UDP', 'ICMP') else 'Other' for name in map(get_protocol_name, range(256))
+)
+
+# Fallback dissection stops after the transport header instead of decoding
+# payloads (DNS, TLS, ...) the summary never reads; unsupported before scapy 2.6
+DISSECT_OPTIONS = (
+    {"stop_dissection_after": (TCP, UDP, ICMP)}
+    if "stop_dissection_after" in inspect.signature(Packet.__init__).parameters else {}
+)
+
+@contextmanager
+def open_capture(file_path: str, buffer_size: int = PCAP_READ_BUFFER, use_mmap: bool = PCAP_USE_MMAP):
+    """
+    Open a capture file for sequential reading.
+
+    With use_mmap the file is memory-mapped read-only, so the kernel pages it
+    in on demand and reads skip the user-space buffer copy. Empty files fall
+    back to a buffered handle since they cannot be mapped.
+
+    Args:
+        file_path (str): Path to the capture file.
+        buffer_size (int): Read buffer size in bytes for the buffered handle.
+        use_mmap (bool): Memory-map the file instead of buffering it.
+
+    Yields:
+        A binary file-like object positioned at the start of the capture.
+    """
+    with open(file_path, "rb", buffering=buffer_size) as fobj:
+        if not use_mmap or os.fstat(fobj.fileno()).st_size == 0:
+            yield fobj
+            return
+        with mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            yield mapped
+
+def packet_stream(file_path: str, buffer_size: int = PCAP_READ_BUFFER) -> Callable[[], Iterator[Packet]]:
+    """
+    Return a factory that starts a fresh streaming pass over a capture file.
+
+    Each call opens its own PcapReader, so consumers walk the capture one
+    packet at a time instead of holding the whole file in memory.
+
+    Args:
+        file_path (str): Path to the pcap or pcapng file.
+        buffer_size (int): Read buffer size in bytes for the underlying file.
+
+    Returns:
+        Callable[[], Iterator[Packet]]: Zero-argument callable yielding packets.
+    """
+    def stream() -> Iterator[Packet]:
+        with open_capture(file_path, buffer_size) as fobj, PcapReader(fobj) as reader:
+            for pkt in reader:
+                yield pkt
+    return stream
+
+def _raw_ipv4_row(buf: bytes) -> Optional[Tuple[int, str, str, Optional[int], Optional[int]]]:
+    """
+    Read (proto, src, dst, sport, dport) from an Ethernet/IPv4 frame without dissecting it.
+
+    Returns None whenever scapy could see the frame differently, so the caller falls back.
+    """
+    header = ipv4_header(buf)
+    if header is None:
+        return None
+    proto, src, dst, offset, fragment = header
+    if not fragment and proto in (6, 17):
+        sport, dport = unpack_from("!HH", buf, offset)
+        return proto, inet_ntoa(src), inet_ntoa(dst), sport, dport
+    return proto, inet_ntoa(src), inet_ntoa(dst), None, None
+
+def _scapy_ipv4_row(pkt: Packet) -> Optional[Tuple[int, str, str, Optional[int], Optional[int]]]:
+    """(proto, src, dst, sport, dport) of a dissected packet, or None without an IP layer"""
+    ip = pkt.getlayer(IP)
+    if ip is None:
+        return None
+    transport = pkt.getlayer(TCP) if ip.proto == 6 else pkt.getlayer(UDP) if ip.proto == 17 else None
+    if transport is None:
+        return ip.proto, ip.src, ip.dst, None, None
+    return ip.proto, ip.src, ip.dst, transport.sport, transport.dport
+
+def iter_pcap_rows(file_path: str) -> Iterator[Tuple[Any, str, str, str, Optional[int], Optional[int]]]:
+    """
+    Stream one row tuple per IP packet of a pcap or pcapng file, in PCAP_COLUMNS order.
+
+    Records are read raw and Ethernet/IPv4 headers are decoded directly;
+    only frames the fast path cannot vouch for are dissected by Scapy.
+    Memory stays flat however large the capture is.
+
+    Args:
+        file_path (str): Path to the pcap file.
+
+    Yields:
+        tuple: (timestamp, source IP, destination IP, protocol, source port, destination port)
+    """
+    with open_capture(file_path) as fobj, RawPcapReader(fobj) as reader:
+        # Classic pcap has one link type and resolution; pcapng carries them per record
+        pcap_linktype = getattr(reader, "linktype", None)
+        power = Decimal(10) ** Decimal(-9 if getattr(reader, "nano", False) else -6)
+
+        for buf, meta in reader:
+            if pcap_linktype is not None:
+                linktype = pcap_linktype
+                timestamp = EDecimal(meta.sec + power * meta.usec)
+            else:
+                linktype = meta.linktype
+                timestamp = EDecimal((meta.tshigh << 32) + meta.tslow) / meta.tsresol if meta.tshigh is not None else None
+
+            row = _raw_ipv4_row(buf) if linktype == LINKTYPE_ETHERNET else None
+            if row is None:
+                try:
+                    row = _scapy_ipv4_row(conf.l2types.num2layer[linktype](buf, **DISSECT_OPTIONS))
+                except Exception:
+                    row = None
+                if row is None:
+                    continue
+
+            proto_num, src_ip, dst_ip, src_port, dst_port = row
+            # Map protocol to TCP/UDP/ICMP/Other
+            protocol = PROTOCOL_LABELS[proto_num]
+
+            # Ports only for TCP or UDP
+            if protocol not in ('TCP', 'UDP'):
+                src_port = dst_port = None
+
+            yield timestamp, src_ip, dst_ip, protocol, src_port, dst_port
 
 def parse_pcap(file_path: str) -> pd.DataFrame:
     """
     Parse a pcap or pcapng file and extract relevant packet information.
 
+    Uncompressed classic Ethernet captures are decoded in NumPy batches
+    straight from the memory-mapped file, spread over a process pool once
+    they reach PCAP_PARALLEL_MIN_MB. Other captures stream through
+    iter_pcap_rows into per-column lists rather than one dict per packet.
+
     Args:
         file_path (str): Path to the pcap file.
 
@@ -24,43 +197,169 @@ def parse_pcap(file_path: str) -> pd.DataFrame:
             - Source Port
             - Destination Port
     """
-    packets = rdpcap(file_path)
-    parsed_data = []
+    columns = _vectorized_pcap_columns(file_path)
+    if columns is None:
+        columns = tuple([] for _ in PCAP_COLUMNS)
+        appends = tuple(column.append for column in columns)
+        for row in iter_pcap_rows(file_path):
+            for append, value in zip(appends, row):
+                append(value)
 
-    for pkt in packets:
-        if IP in pkt:
-            timestamp = pkt.time
-            src_ip = pkt[IP].src
-            dst_ip = pkt[IP].dst
-            proto_num = pkt[IP].proto
-            protocol_name = get_protocol_name(proto_num)
-            # Map protocol to TCP/UDP/ICMP/Other
-            if protocol_name in ['TCP', 'UDP', 'ICMP']:
-                protocol = protocol_name
-            else:
-                protocol = 'Other'
-
-            # Extract ports if TCP or UDP
-            src_port = None
-            dst_port = None
-            if protocol == 'TCP' and TCP in pkt:
-                src_port = pkt[TCP].sport
-                dst_port = pkt[TCP].dport
-            elif protocol == 'UDP' and UDP in pkt:
-                src_port = pkt[UDP].sport
-                dst_port = pkt[UDP].dport
-
-            parsed_data.append({
-                'Timestamp': timestamp,
-                'Source IP': src_ip,
-                'Destination IP': dst_ip,
-                'Protocol': protocol,
-                'Source Port': src_port,
-                'Destination Port': dst_port
-            })
-
-    df = pd.DataFrame(parsed_data)
-    return df
+    if not columns[0]:
+        return pd.DataFrame()
+    return pd.DataFrame(dict(zip(PCAP_COLUMNS, columns)))
+
+def _vectorized_pcap_columns(file_path: str) -> Optional[Tuple[list, ...]]:
+    """
+    Decode an uncompressed classic pcap of Ethernet frames with NumPy.
+
+    Returns the PCAP_COLUMNS as lists, or None when the file is not such a
+    capture (pcapng, gzip, other link types) and must be streamed instead.
+    """
+    with open(file_path, "rb") as fobj:
+        header = fobj.read(24)
+        if len(header) < 24 or header[:4] not in PCAP_MAGICS:
+            return None
+        endian, nano = PCAP_MAGICS[header[:4]]
+        if Struct(endian + "I").unpack_from(header, 20)[0] & 0x0FFFFFFF != LINKTYPE_ETHERNET:
+            return None
+        if os.fstat(fobj.fileno()).st_size == 24:
+            return tuple([] for _ in PCAP_COLUMNS)
+        with mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            offsets = _with_buffers(mapped, lambda data, raw: _index_records(raw, Struct(endian + "I").unpack_from, len(data)))
+            batches = _record_batches(offsets, len(mapped))
+
+            workers = min(os.cpu_count() or 1, 8, len(batches))
+            if len(mapped) >= PCAP_PARALLEL_MIN_MB * 1024 * 1024 and workers > 1:
+                try:
+                    return _merge_batches(_decode_parallel(file_path, endian, nano, batches, workers))
+                except Exception:
+                    pass  # Fall back to the in-process path
+            return _with_buffers(mapped, lambda data, raw: _merge_batches(
+                _decode_batch(data, raw, endian, nano, batch) for batch in batches))
+
+def _with_buffers(mapped: mmap.mmap, func: Callable[[np.ndarray, memoryview], Any]) -> Any:
+    """Call func with NumPy and memoryview views of the map, releasing both afterwards"""
+    data = np.frombuffer(mapped, dtype=np.uint8)
+    raw = memoryview(mapped)
+    try:
+        return func(data, raw)
+    finally:
+        # Drop the buffer exports so the map can close
+        del data
+        raw.release()
+
+def _index_records(raw: memoryview, unpack_caplen: Callable, size: int) -> array:
+    """
+    Walk the record headers into an array of frame offsets.
+
+    Only caplen is needed to find the next record; the rest of each record
+    header is gathered per batch by _decode_batch.
+    """
+    offsets = array("q")
+    append = offsets.append
+    pos = 24
+    # Mirrors RawPcapReader: a short record header ends the capture
+    while pos + 16 <= size:
+        append(pos + 16)
+        pos += 16 + unpack_caplen(raw, pos + 8)[0]
+    return offsets
+
+def _record_batches(offsets: array, size: int) -> List[array]:
+    """Split the record index into batches, smaller ones when a large capture is spread over workers"""
+    count = len(offsets)
+    batch = VECTOR_BATCH_RECORDS
+    if size >= PCAP_PARALLEL_MIN_MB * 1024 * 1024:
+        batch = max(1, min(batch, -(-count // min(os.cpu_count() or 1, 8))))
+    return [offsets[start:start + batch] for start in range(0, count, batch)]
+
+def _merge_batches(parts) -> Tuple[list, ...]:
+    """Concatenate per-batch columns in order"""
+    columns = tuple([] for _ in PCAP_COLUMNS)
+    for part in parts:
+        for column, values in zip(columns, part):
+            column.extend(values)
+    return columns
+
+def _decode_parallel(file_path: str, endian: str, nano: bool, batches: List[array], workers: int) -> List[Tuple[list, ...]]:
+    """Decode batches on a process pool; each worker maps the file itself, so only the index is shipped"""
+    jobs = [(file_path, endian, nano, batch) for batch in batches]
+    return pool_map(_decode_file_batch, jobs, workers)
+
+def _decode_file_batch(job: Tuple[Any, ...]) -> Tuple[list, ...]:
+    """Process-pool entry point: map the capture and decode one batch of records"""
+    file_path, endian, nano, offsets = job
+    with open(file_path, "rb") as fobj, mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return _with_buffers(mapped, lambda data, raw: _decode_batch(data, raw, endian, nano, offsets))
+
+def _decode_batch(data: np.ndarray, raw: memoryview, endian: str, nano: bool, offsets: array) -> Tuple[list, ...]:
+    """Decode the record and frame headers of one batch of records at once"""
+    size = len(data)
+    power = Decimal(10) ** Decimal(-9 if nano else -6)
+    window = np.arange(HEADER_WINDOW)
+    offset = np.frombuffer(offsets, dtype=np.int64)
+
+    # Record headers (sec, frac, caplen, wirelen) precede each frame; a short frame is kept truncated
+    record = data[(offset - 16)[:, None] + np.arange(16)].view(np.dtype(endian + "u4"))
+    caplen = np.minimum(np.minimum(record[:, 2].astype(np.int64), size - offset), MTU)
+
+    # Fixed-width header matrix; bytes past a frame's end read as zero
+    index = offset[:, None] + window
+    hdr = data[np.minimum(index, size - 1)]
+    hdr[window >= caplen[:, None]] = 0
+    hdr16 = hdr.astype(np.uint16)
+    hdr32 = hdr.astype(np.uint32)
+
+    ethertype = (hdr16[:, 12] << 8) | hdr16[:, 13]
+    ihl = (hdr[:, 14] & 0x0F).astype(np.int64) * 4
+    ip_len = (hdr16[:, 16] << 8) | hdr16[:, 17]
+    first_fragment = ((hdr16[:, 20] & 0x1F) | hdr16[:, 21]) == 0
+    proto = hdr[:, 23]
+    src = (hdr32[:, 26] << 24) | (hdr32[:, 27] << 16) | (hdr32[:, 28] << 8) | hdr32[:, 29]
+    dst = (hdr32[:, 30] << 24) | (hdr32[:, 31] << 16) | (hdr32[:, 32] << 8) | hdr32[:, 33]
+
+    # Same acceptance rules as _raw_ipv4_row; anything else goes to scapy
+    ipv4 = (caplen >= ETH_HEADER_LEN + 20) & (ethertype == ETHERTYPE_IPV4) & (hdr[:, 14] >> 4 == 4) & (ihl >= 20)
+    ipv4 &= caplen >= ETH_HEADER_LEN + ihl
+    has_ports = ipv4 & first_fragment & ((proto == 6) | (proto == 17))
+    header_len = np.where(proto == 6, 20, 8)
+    clipped = has_ports & ((caplen < ETH_HEADER_LEN + ihl + header_len) | (ip_len < ihl + header_len))
+    fast = ipv4 & ~clipped
+
+    rows = np.arange(len(offset))
+    port_at = ETH_HEADER_LEN + ihl
+    sport = (hdr16[rows, port_at] << 8) | hdr16[rows, port_at + 1]
+    dport = (hdr16[rows, port_at + 2] << 8) | hdr16[rows, port_at + 3]
+
+    # Strings and labels are built per distinct value, then gathered per row
+    unique, inverse = np.unique(np.concatenate((src, dst)), return_inverse=True)
+    names = np.array([inet_ntoa(int(a).to_bytes(4, "big")) for a in unique.tolist()], dtype=object)
+    src_names = names[inverse[:len(rows)]]
+    dst_names = names[inverse[len(rows):]]
+    protocols = np.array(PROTOCOL_LABELS, dtype=object)[proto]
+    sport = sport.astype(object)
+    dport = dport.astype(object)
+    sport[~has_ports] = None
+    dport[~has_ports] = None
+    timestamps = np.empty(len(rows), dtype=object)
+    timestamps[:] = [EDecimal(sec + power * frac) for sec, frac in zip(record[:, 0].tolist(), record[:, 1].tolist())]
+
+    # Frames the vector path cannot vouch for are dissected by scapy, or dropped without IP
+    keep = fast.copy()
+    for n in np.flatnonzero(~fast).tolist():
+        try:
+            row = _scapy_ipv4_row(Ether(bytes(raw[offsets[n]:offsets[n] + int(caplen[n])]), **DISSECT_OPTIONS))
+        except Exception:
+            row = None
+        if row is None:
+            continue
+        keep[n] = True
+        proto_num, src_names[n], dst_names[n], sport[n], dport[n] = row
+        protocols[n] = PROTOCOL_LABELS[proto_num] if 0 <= proto_num < 256 else 'Other'
+        if protocols[n] not in ('TCP', 'UDP'):
+            sport[n] = dport[n] = None
+
+    return tuple(values[keep].tolist() for values in (timestamps, src_names, dst_names, protocols, sport, dport))
 
 def generate_summary(df: pd.DataFrame) -> dict:
     """
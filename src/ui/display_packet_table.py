@@ -9,75 +9,228 @@ import streamlit as st
 from scapy.layers.inet import IP, TCP, UDP, ICMP
 from scapy.layers.l2 import Ether
 from scapy.packet import Packet
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from itertools import chain
+from collections import OrderedDict
 import pandas as pd
 import binascii
+import math
+import os
+from socket import inet_ntoa
+from struct import unpack_from
 from src.ui.icons import icon
+from src.utils.helpers import capture_key, ipv4_header, packet_length, pool_map
 
 
-def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
-    """Extract summary information from packets into a DataFrame."""
-    data = []
+# TCP flag bits in display order (name, mask)
+TCP_FLAG_BITS = (("SYN", 0x02), ("ACK", 0x10), ("FIN", 0x01), ("RST", 0x04), ("PSH", 0x08))
+
+# Captures at least this large are summarized across worker processes
+PARALLEL_SUMMARY_MIN_PACKETS = 20000
+
+# Session-state slot holding (packets, summary frame) for the packet list on screen
+SUMMARY_CACHE_KEY = "packet_table_summary"
+
+# Session-state LRU of inspected packet details, keyed by (capture digest, packet index)
+DETAIL_CACHE_KEY = "packet_detail_cache"
+DETAIL_CACHE_SIZE = 32
+
+# One inspector field row; a card's rows are joined into a single markdown call
+FIELD_ROW_TMPL = "**{}:** {}"
+
+# Row hover styling for the packet list
+PACKET_ROW_CSS = """
+<style>
+.packet-row {
+    padding: 0.75rem 1rem;
+    border-bottom: 1px solid rgba(255,255,255,0.08);
+    transition: background 0.15s;
+}
+.packet-row:hover {
+    background: rgba(0, 212, 255, 0.1);
+}
+</style>
+"""
+
+
+def _fast_fields(buf: bytes, ip_cache: dict) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Parse (src_ip, dst_ip, protocol, info) straight from an Ethernet/IPv4 frame.
     
-    for idx, pkt in enumerate(packets):
-        row = {
-            "id": idx + 1,
-            "time": float(pkt.time) if hasattr(pkt, 'time') else 0,
-            "src_ip": "",
-            "dst_ip": "",
-            "protocol": "Unknown",
-            "length": len(pkt),
-            "info": ""
-        }
-        
-        # Extract IP layer info
-        if IP in pkt:
-            row["src_ip"] = pkt[IP].src
-            row["dst_ip"] = pkt[IP].dst
-            row["protocol"] = get_protocol_name(pkt[IP].proto)
-        elif Ether in pkt:
-            row["src_ip"] = pkt[Ether].src
-            row["dst_ip"] = pkt[Ether].dst
+    Returns None for anything outside the plain IPv4 TCP/UDP/ICMP case (VLAN tags,
+    IPv6, fragments, tunnels, truncated or length-clipped headers) so the caller
+    can use scapy instead.
+    """
+    header = ipv4_header(buf)
+    if header is None:
+        return None
+    proto, src_raw, dst_raw, offset, fragment = header
+    if fragment or proto not in (6, 17, 1):
+        return None
+    
+    if proto == 6:
+        sport, dport = unpack_from("!HH", buf, offset)
+        flag_value = buf[offset + 13]
+        info = f"Port {sport} → {dport}"
+        flags = [name for name, mask in TCP_FLAG_BITS if flag_value & mask]
+        if flags:
+            info += f" [{','.join(flags)}]"
+        protocol = "TCP"
+    elif proto == 17:
+        sport, dport = unpack_from("!HH", buf, offset)
+        info = f"Port {sport} → {dport}"
+        protocol = "UDP"
+    else:
+        info = f"Type {buf[offset]}, Code {buf[offset + 1]}"
+        protocol = "ICMP"
+    
+    # Captures repeat a small set of addresses; format each one once
+    src_ip = ip_cache.get(src_raw)
+    if src_ip is None:
+        src_ip = ip_cache[src_raw] = inet_ntoa(src_raw)
+    dst_ip = ip_cache.get(dst_raw)
+    if dst_ip is None:
+        dst_ip = ip_cache[dst_raw] = inet_ntoa(dst_raw)
+    return src_ip, dst_ip, protocol, info
+
+
+def _scapy_row(pkt: Packet, idx: int) -> dict:
+    """Build a summary row through scapy's dissected layers."""
+    row = {
+        "id": idx,
+        "time": float(pkt.time) if hasattr(pkt, 'time') else 0,
+        "src_ip": "",
+        "dst_ip": "",
+        "protocol": "Unknown",
+        "length": packet_length(pkt),
+        "info": ""
+    }
+    
+    # Extract IP layer info
+    ip = pkt.getlayer(IP)
+    if ip is not None:
+        row["src_ip"] = ip.src
+        row["dst_ip"] = ip.dst
+        row["protocol"] = get_protocol_name(ip.proto)
+    else:
+        eth = pkt.getlayer(Ether)
+        if eth is not None:
+            row["src_ip"] = eth.src
+            row["dst_ip"] = eth.dst
             row["protocol"] = "Ethernet"
-        
-        # Get transport layer info
-        if TCP in pkt:
-            row["protocol"] = "TCP"
-            row["info"] = f"Port {pkt[TCP].sport} → {pkt[TCP].dport}"
-            flags = []
-            if pkt[TCP].flags.S: flags.append("SYN")
-            if pkt[TCP].flags.A: flags.append("ACK")
-            if pkt[TCP].flags.F: flags.append("FIN")
-            if pkt[TCP].flags.R: flags.append("RST")
-            if pkt[TCP].flags.P: flags.append("PSH")
-            if flags:
-                row["info"] += f" [{','.join(flags)}]"
-        elif UDP in pkt:
+    
+    # Get transport layer info
+    tcp = pkt.getlayer(TCP)
+    if tcp is not None:
+        row["protocol"] = "TCP"
+        row["info"] = f"Port {tcp.sport} → {tcp.dport}"
+        flag_value = int(tcp.flags)
+        flags = [name for name, mask in TCP_FLAG_BITS if flag_value & mask]
+        if flags:
+            row["info"] += f" [{','.join(flags)}]"
+    else:
+        udp = pkt.getlayer(UDP)
+        if udp is not None:
             row["protocol"] = "UDP"
-            row["info"] = f"Port {pkt[UDP].sport} → {pkt[UDP].dport}"
-        elif ICMP in pkt:
-            row["protocol"] = "ICMP"
-            row["info"] = f"Type {pkt[ICMP].type}, Code {pkt[ICMP].code}"
-        
-        data.append(row)
+            row["info"] = f"Port {udp.sport} → {udp.dport}"
+        else:
+            icmp = pkt.getlayer(ICMP)
+            if icmp is not None:
+                row["protocol"] = "ICMP"
+                row["info"] = f"Type {icmp.type}, Code {icmp.code}"
     
-    return pd.DataFrame(data)
+    return row
+
+
+def _summarize_records(records, start_id: int = 1) -> List[dict]:
+    """
+    Build summary rows from (packet class, raw bytes, timestamp, packet) records.
+    
+    Ethernet/IPv4 frames are parsed from the raw bytes; everything else is
+    dissected by scapy. The packet slot may be None, in which case it is
+    rebuilt from the class and bytes only when the slow path needs it.
+    """
+    _Ether = Ether
+    ip_cache: dict = {}
+    data = []
+    append = data.append
+    
+    for idx, (cls, buf, ts, pkt) in enumerate(records, start=start_id):
+        fields = _fast_fields(buf, ip_cache) if cls is _Ether else None
+        if fields is None:
+            if pkt is None:
+                pkt = cls(buf)
+                pkt.time = ts
+            append(_scapy_row(pkt, idx))
+            continue
+        src_ip, dst_ip, protocol, info = fields
+        append({
+            "id": idx,
+            "time": float(ts),
+            "src_ip": src_ip,
+            "dst_ip": dst_ip,
+            "protocol": protocol,
+            "length": len(buf),
+            "info": info
+        })
+    
+    return data
+
+
+def _summarize_rows(packets: List[Packet], start_id: int = 1) -> List[dict]:
+    """Build summary rows for a run of packets, numbering from start_id."""
+    return _summarize_records(
+        ((pkt.__class__, pkt.original or bytes(pkt), getattr(pkt, 'time', 0), pkt) for pkt in packets),
+        start_id
+    )
+
+
+def _summarize_raw_chunk(args: Tuple[List[tuple], int]) -> List[dict]:
+    """Worker entry point: summarize (class, bytes, time) records."""
+    records, start_id = args
+    return _summarize_records(((cls, raw, ts, None) for cls, raw, ts in records), start_id)
+
+
+def _summarize_parallel(packets: List[Packet], workers: int) -> List[dict]:
+    """Summarize packets in contiguous chunks on a process pool, preserving order."""
+    chunk_size = math.ceil(len(packets) / workers)
+    jobs = []
+    for start in range(0, len(packets), chunk_size):
+        # Scapy packets pickle poorly; ship raw bytes and parse in the worker
+        records = [(p.__class__, p.original or bytes(p), p.time) for p in packets[start:start + chunk_size]]
+        jobs.append((records, start + 1))
+    
+    return list(chain.from_iterable(pool_map(_summarize_raw_chunk, jobs, workers)))
+
+
+def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
+    """Extract summary information from packets into a DataFrame."""
+    workers = min(os.cpu_count() or 1, 8)
+    if len(packets) >= PARALLEL_SUMMARY_MIN_PACKETS and workers > 1:
+        try:
+            return pd.DataFrame(_summarize_parallel(packets, workers))
+        except Exception:
+            pass  # Fall back to the in-process path
+    return pd.DataFrame(_summarize_rows(packets))
+
+
+# IP protocol number -> display name, built once rather than per row
+PROTOCOL_NAMES = {
+    1: "ICMP",
+    6: "TCP",
+    17: "UDP",
+    41: "IPv6",
+    47: "GRE",
+    50: "ESP",
+    51: "AH",
+    89: "OSPF",
+    132: "SCTP"
+}
 
 
 def get_protocol_name(proto_num: int) -> str:
     """Convert protocol number to name."""
-    protocols = {
-        1: "ICMP",
-        6: "TCP",
-        17: "UDP",
-        41: "IPv6",
-        47: "GRE",
-        50: "ESP",
-        51: "AH",
-        89: "OSPF",
-        132: "SCTP"
-    }
-    return protocols.get(proto_num, f"Proto-{proto_num}")
+    return PROTOCOL_NAMES.get(proto_num) or f"Proto-{proto_num}"
 
 
 def get_protocol_badge_class(protocol: str) -> str:
@@ -96,7 +249,81 @@ def get_protocol_badge_class(protocol: str) -> str:
     return "sr-protocol-other"
 
 
-def render_packet_inspector(packet: Packet) -> None:
+def packet_detail(packet: Packet) -> Tuple[List[Tuple[str, List[Tuple[str, str]]]], str]:
+    """Read the inspector's layer cards, as (title, [(label, value)]), and the hex dump of a packet."""
+    cards = []
+    
+    eth = packet.getlayer(Ether)
+    if eth is not None:
+        cards.append(("Ethernet Layer", [
+            ("Source MAC", f"`{eth.src}`"),
+            ("Destination MAC", f"`{eth.dst}`"),
+            ("Type", f"`0x{eth.type:04x}`"),
+        ]))
+    
+    ip = packet.getlayer(IP)
+    if ip is not None:
+        cards.append(("IP Layer", [
+            ("Source IP", f"`{ip.src}`"),
+            ("Destination IP", f"`{ip.dst}`"),
+            ("Version", f"`{ip.version}`"),
+            ("Protocol", f"`{get_protocol_name(ip.proto)}`"),
+            ("TTL", f"`{ip.ttl}`"),
+            ("Total Length", f"`{ip.len}` bytes"),
+        ]))
+    
+    tcp = packet.getlayer(TCP)
+    if tcp is not None:
+        flag_value = int(tcp.flags)
+        flags = [name for name, mask in TCP_FLAG_BITS if flag_value & mask]
+        cards.append(("TCP Layer", [
+            ("Source Port", f"`{tcp.sport}`"),
+            ("Destination Port", f"`{tcp.dport}`"),
+            ("Sequence", f"`{tcp.seq}`"),
+            ("Acknowledgment", f"`{tcp.ack}`"),
+            ("Window", f"`{tcp.window}`"),
+            ("Flags", f"`{', '.join(flags) if flags else 'None'}`"),
+        ]))
+    
+    udp = packet.getlayer(UDP)
+    if udp is not None:
+        cards.append(("UDP Layer", [
+            ("Source Port", f"`{udp.sport}`"),
+            ("Destination Port", f"`{udp.dport}`"),
+            ("Length", f"`{udp.len}` bytes"),
+        ]))
+    
+    icmp = packet.getlayer(ICMP)
+    if icmp is not None:
+        cards.append(("ICMP Layer", [
+            ("Type", f"`{icmp.type}`"),
+            ("Code", f"`{icmp.code}`"),
+        ]))
+    
+    return cards, format_hex_dump(bytes(packet))
+
+
+def cached_packet_detail(packets: List[Packet], index: int, capture_id: Optional[str] = None):
+    """
+    packet_detail of packets[index], memoized in session state so inspecting
+    a packet again does not re-read its scapy fields or re-format its bytes.
+    
+    capture_id identifies the capture's contents (e.g. the upload's digest); without
+    it the packets are hashed.
+    """
+    cache = st.session_state.setdefault(DETAIL_CACHE_KEY, OrderedDict())
+    key = (capture_id or capture_key(packets), index)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    
+    detail = cache[key] = packet_detail(packets[index])
+    if len(cache) > DETAIL_CACHE_SIZE:
+        cache.popitem(last=False)
+    return detail
+
+
+def render_packet_inspector(packets: List[Packet], index: int, capture_id: Optional[str] = None) -> None:
     """Render detailed packet inspection view."""
     eye_icon = icon("eye", "lg")
     st.markdown(f"""
@@ -105,76 +332,13 @@ def render_packet_inspector(packet: Packet) -> None:
         </div>
     """, unsafe_allow_html=True)
     
-    # Ethernet Layer
-    if Ether in packet:
-        with st.expander("Ethernet Layer", expanded=True):
-            eth = packet[Ether]
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown(f"**Source MAC:** `{eth.src}`")
-            with col2:
-                st.markdown(f"**Destination MAC:** `{eth.dst}`")
-            st.markdown(f"**Type:** `0x{eth.type:04x}`")
-    
-    # IP Layer
-    if IP in packet:
-        with st.expander("IP Layer", expanded=True):
-            ip = packet[IP]
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown(f"**Source IP:** `{ip.src}`")
-                st.markdown(f"**Version:** `{ip.version}`")
-                st.markdown(f"**TTL:** `{ip.ttl}`")
-            with col2:
-                st.markdown(f"**Destination IP:** `{ip.dst}`")
-                st.markdown(f"**Protocol:** `{get_protocol_name(ip.proto)}`")
-                st.markdown(f"**Total Length:** `{ip.len}` bytes")
-    
-    # TCP Layer
-    if TCP in packet:
-        with st.expander("TCP Layer", expanded=True):
-            tcp = packet[TCP]
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown(f"**Source Port:** `{tcp.sport}`")
-                st.markdown(f"**Sequence:** `{tcp.seq}`")
-                st.markdown(f"**Window:** `{tcp.window}`")
-            with col2:
-                st.markdown(f"**Destination Port:** `{tcp.dport}`")
-                st.markdown(f"**Acknowledgment:** `{tcp.ack}`")
-                flags = []
-                if tcp.flags.S: flags.append("SYN")
-                if tcp.flags.A: flags.append("ACK")
-                if tcp.flags.F: flags.append("FIN")
-                if tcp.flags.R: flags.append("RST")
-                if tcp.flags.P: flags.append("PSH")
-                st.markdown(f"**Flags:** `{', '.join(flags) if flags else 'None'}`")
-    
-    # UDP Layer
-    if UDP in packet:
-        with st.expander("UDP Layer", expanded=True):
-            udp = packet[UDP]
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown(f"**Source Port:** `{udp.sport}`")
-            with col2:
-                st.markdown(f"**Destination Port:** `{udp.dport}`")
-            st.markdown(f"**Length:** `{udp.len}` bytes")
-    
-    # ICMP Layer
-    if ICMP in packet:
-        with st.expander("ICMP Layer", expanded=True):
-            icmp = packet[ICMP]
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown(f"**Type:** `{icmp.type}`")
-            with col2:
-                st.markdown(f"**Code:** `{icmp.code}`")
+    cards, hex_dump = cached_packet_detail(packets, index, capture_id)
+    for title, rows in cards:
+        with st.expander(title, expanded=True):
+            st.markdown("  \n".join([FIELD_ROW_TMPL.format(label, value) for label, value in rows]))
     
     # Hex Dump
     with st.expander("Raw Data (Hex)", expanded=False):
-        raw_bytes = bytes(packet)
-        hex_dump = format_hex_dump(raw_bytes)
         st.code(hex_dump, language=None)
 
 
@@ -189,14 +353,24 @@ def format_hex_dump(data: bytes, bytes_per_line: int = 16) -> str:
     return '\n'.join(lines)
 
 
-def display_packet_table(packets: List[Packet]) -> None:
-    """Display packets in an interactive table with filtering."""
+def display_packet_table(packets: List[Packet], capture_id: Optional[str] = None) -> None:
+    """
+    Display packets in an interactive table with filtering.
+    
+    capture_id identifies the capture's contents (e.g. the upload's digest) for
+    the packet inspector's cache; without it the packets are hashed.
+    """
     if not packets:
         st.warning("No packets to display.")
         return
     
-    # Extract packet data
-    df = extract_packet_summary(packets)
+    # Extract packet data once per packet list; filters and paging rerun against the cached frame
+    cached = st.session_state.get(SUMMARY_CACHE_KEY)
+    if cached is not None and cached[0] is packets:
+        df = cached[1]
+    else:
+        df = extract_packet_summary(packets)
+        st.session_state[SUMMARY_CACHE_KEY] = (packets, df)
     
     bar_icon = icon("bar-chart")
     # Search and filter bar
@@ -236,8 +410,8 @@ def display_packet_table(packets: List[Packet]) -> None:
             label_visibility="collapsed"
         )
     
-    # Apply filters
-    filtered_df = df.copy()
+    # Apply filters (each step returns a new frame, so the cached one is never modified)
+    filtered_df = df
     
     if search_term:
         mask = (
@@ -259,18 +433,7 @@ def display_packet_table(packets: List[Packet]) -> None:
         st.info(f"Showing {len(filtered_df)} of {len(df)} packets")
     
     # Display table
-    st.markdown("""
-        <style>
-        .packet-row { 
-            padding: 0.75rem 1rem;
-            border-bottom: 1px solid rgba(255,255,255,0.08);
-            transition: background 0.15s;
-        }
-        .packet-row:hover {
-            background: rgba(0, 212, 255, 0.1);
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    st.html(PACKET_ROW_CSS)
     
     # Paginate
     page_size = 50
@@ -338,6 +501,6 @@ def display_packet_table(packets: List[Packet]) -> None:
     
     if st.button("Inspect Packet", key="inspect_btn"):
         if 1 <= packet_id <= len(packets):
-            render_packet_inspector(packets[packet_id - 1])
+            render_packet_inspector(packets, packet_id - 1, capture_id)
         else:
             st.error("Invalid packet ID")
\ No newline at end of file
@@ -7,19 +7,23 @@ Clean, modular implementation using external CSS design system.
 
 import streamlit as st
 import os
+import hashlib
+import shutil
 import sys
 import json
 import tempfile
+import orjson
 import pandas as pd
 from pathlib import Path
-from dataclasses import asdict, is_dataclass
+from typing import Optional
+from functools import lru_cache
+from decimal import Decimal
 from dotenv import load_dotenv
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from src.parsers.pcap_parser import parse_pcap
-from src.parsers.csv_parser import parse_csv
+from src.parsers.pcap_parser import parse_pcap, packet_stream
 from src.parsers.txt_parser import parse_txt
 from src.ui.icons import icon, ICONS
 
@@ -31,30 +35,77 @@ load_dotenv()
 load_dotenv('/app/.env', override=False)  # Docker path
 
 
-class CustomJSONEncoder(json.JSONEncoder):
-    """Handle special types for JSON serialization."""
-    def default(self, o):
-        if o.__class__.__name__ == "EDecimal":
-            return float(o)
-        if is_dataclass(o) and not isinstance(o, type):
-            return asdict(o)
-        return super().default(o)
+def _json_default(o):
+    """Handle types orjson does not serialize natively."""
+    if isinstance(o, Decimal):  # scapy's EDecimal packet timestamps
+        return float(o)
+    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
 
 
-def save_summary(summary: dict) -> None:
-    """Save analysis summary to JSON file."""
-    with open("output/summary.json", "w") as f:
-        json.dump(summary, f, indent=4, cls=CustomJSONEncoder)
+def summary_json(summary) -> bytes:
+    """Serialize an analysis summary (or session export) to JSON bytes."""
+    options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    return orjson.dumps(summary, default=_json_default, option=options)
 
 
+def save_summary(summary: dict) -> bytes:
+    """Save analysis summary to JSON file and return the bytes written."""
+    payload = summary_json(summary)
+    # Write a sibling temp file and swap it in, so readers never see a half-written summary.
+    # mkstemp gives each call its own file; sessions are threads of one process.
+    fd, tmp_path = tempfile.mkstemp(dir="output", prefix="summary.", suffix=".json.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, "output/summary.json")
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return payload
+
+
+def decimals_to_float(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of df with Decimal cells (scapy's EDecimal timestamps) as floats.
+
+    Converting each such column once up front keeps the serializer on its
+    fast path instead of calling the encoder's default() for every packet.
+    """
+    converted = {}
+    for name in df.columns[df.dtypes == object]:
+        column = df[name]
+        first = column.first_valid_index()
+        if first is not None and isinstance(column[first], Decimal):
+            values = [float(v) if isinstance(v, Decimal) else v for v in column.tolist()]
+            # Stay object dtype so missing timestamps remain None (null), not NaN
+            converted[name] = pd.Series(values, index=column.index, dtype=object)
+    return df.assign(**converted) if converted else df
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def export_summary(file_id: str, _df: pd.DataFrame) -> bytes:
+    """Serialize and save the summary once per upload; reruns reuse the same bytes."""
+    return save_summary(decimals_to_float(_df).to_dict(orient="records"))
+
+
+@lru_cache(maxsize=1)
 def load_css() -> str:
-    """Load CSS from external file."""
+    """Load CSS from external file (read once per process; the stylesheet ships with the app)."""
     css_path = Path(__file__).parent / "styles.css"
     if css_path.exists():
         return css_path.read_text()
     return ""
 
 
+@lru_cache(maxsize=1)
+def style_html() -> str:
+    """The app stylesheet wrapped in a style tag, built once per process."""
+    return f"<style>{load_css()}</style>"
+
+
 def get_favicon_path() -> str:
     """Get the path to the favicon file."""
     # Try different possible paths
@@ -82,24 +133,9 @@ def get_logo_path() -> str:
     return None
 
 
-def check_ollama_status() -> tuple[bool, str]:
-    """Check if Ollama is available and return status."""
-    import urllib.request
-    import urllib.error
-    
-    ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-    try:
-        response = urllib.request.urlopen(f"{ollama_url}/api/tags", timeout=2)
-        if response.status == 200:
-            return True, os.getenv("OLLAMA_MODEL", "qwen2.5-coder:7b")
-    except Exception:
-        pass
-    return False, ""
-
-
-def render_header() -> None:
-    """Render the application header with logo and status indicators."""
-    ollama_online, model_name = check_ollama_status()
+@lru_cache(maxsize=1)
+def header_html() -> str:
+    """Opening header markup (logo + tagline), built once per process instead of re-encoding the logo every rerun."""
     logo_path = get_logo_path()
     
     # Build logo HTML
@@ -109,10 +145,9 @@ def render_header() -> None:
             logo_b64 = base64.b64encode(f.read()).decode()
         logo_html = f'<img src="data:image/png;base64,{logo_b64}" class="sr-logo-img" alt="Sniff-Recon">'
     else:
-        search_icon = icon("search", "lg")
-        logo_html = search_icon
+        logo_html = icon("search", "lg")
     
-    st.markdown(f"""
+    return f"""
         <div class="sr-header">
             <div class="sr-logo">
                 {logo_html}
@@ -122,7 +157,28 @@ def render_header() -> None:
                 </div>
             </div>
             <div class="sr-status-group">
-    """, unsafe_allow_html=True)
+    """
+
+
+def check_ollama_status() -> tuple[bool, str]:
+    """Check if Ollama is available and return status."""
+    import urllib.request
+    import urllib.error
+    
+    ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    try:
+        response = urllib.request.urlopen(f"{ollama_url}/api/tags", timeout=2)
+        if response.status == 200:
+            return True, os.getenv("OLLAMA_MODEL", "qwen2.5-coder:7b")
+    except Exception:
+        pass
+    return False, ""
+
+
+def render_header() -> None:
+    """Render the application header with logo and status indicators."""
+    ollama_online, model_name = check_ollama_status()
+    st.markdown(header_html(), unsafe_allow_html=True)
     
     bot_icon = icon("bot")
     if ollama_online:
@@ -162,8 +218,8 @@ def render_upload_zone() -> object:
     
     uploaded_file = st.file_uploader(
         label="Drop your file here or click to browse",
-        type=["pcap", "pcapng", "csv", "txt"],
-        help="Supported: PCAP, PCAPNG, CSV, TXT (max 200MB)",
+        type=["pcap", "pcapng", "gz", "csv", "txt"],
+        help="Supported: PCAP, PCAPNG (optionally gzip-compressed), CSV, TXT (max 200MB)",
         key="main_file_uploader"
     )
     
@@ -384,21 +440,168 @@ def render_footer() -> None:
     """, unsafe_allow_html=True)
 
 
+# Normalized CSV column -> accepted header names, in order of preference
+CSV_COLUMN_ALIASES = {
+    "src_ip": ("src_ip", "Source IP", "src"),
+    "dst_ip": ("dst_ip", "Destination IP", "dst"),
+    "protocol": ("protocol", "Protocol"),
+    "packet_size": ("packet_size", "Packet Size", "size"),
+}
+
+
+def _parse_csv_rows(file_path: str) -> pd.DataFrame:
+    """
+    Parse a CSV export and normalize its column names.
+
+    Works column-wise on the frame pandas read: each value is the first
+    truthy alias, falling back to the last alias, like an ``or`` chain.
+    """
+    frame = pd.read_csv(file_path)
+    missing = pd.Series([None] * len(frame), index=frame.index, dtype=object)
+    columns = {}
+    for name, aliases in CSV_COLUMN_ALIASES.items():
+        column = frame[aliases[-1]] if aliases[-1] in frame else missing
+        for alias in reversed(aliases[:-1]):
+            if alias in frame:
+                values = frame[alias]
+                column = values.where(values.astype(bool), column)
+        columns[name] = column
+    return pd.DataFrame(columns).infer_objects()
+
+
+# Lower-cased file extension -> parser; scapy inflates gzip captures while reading
+FILE_PARSERS = {
+    ".pcap": parse_pcap,
+    ".pcapng": parse_pcap,
+    ".pcap.gz": parse_pcap,
+    ".pcapng.gz": parse_pcap,
+    ".csv": _parse_csv_rows,
+    ".txt": parse_txt,
+}
+
+# Extensions scapy can dissect into packets for the packet table and AI tabs
+CAPTURE_EXTENSIONS = frozenset({".pcap", ".pcapng", ".pcap.gz", ".pcapng.gz"})
+
+
+def file_extension(filename: str) -> str:
+    """Return the lower-cased extension, keeping a compound suffix such as .pcap.gz."""
+    suffixes = Path(filename.lower()).suffixes
+    compound = "".join(suffixes[-2:])
+    return compound if compound in FILE_PARSERS else (suffixes[-1] if suffixes else "")
+
+
 def process_file(uploaded_file, tmp_file_path: str, file_ext: str):
     """Process the uploaded file and return parsed data."""
-    if file_ext in ["pcap", "pcapng"]:
-        return parse_pcap(tmp_file_path)
-    elif file_ext == "csv":
-        parsed = parse_csv(tmp_file_path)
-        return [{
-            "src_ip": row.get("src_ip") or row.get("Source IP") or row.get("src"),
-            "dst_ip": row.get("dst_ip") or row.get("Destination IP") or row.get("dst"),
-            "protocol": row.get("protocol") or row.get("Protocol"),
-            "packet_size": row.get("packet_size") or row.get("Packet Size") or row.get("size"),
-        } for row in parsed]
-    elif file_ext == "txt":
-        return parse_txt(tmp_file_path)
-    return None
+    parser = FILE_PARSERS.get(file_ext)
+    return parser(tmp_file_path) if parser else None
+
+
+class UploadSpool:
+    """
+    Temp-file copy of an upload, written only when a parser needs a path.
+
+    Reruns served entirely from cache never touch the disk; the first access
+    to path writes the upload's in-memory buffer out through a memoryview
+    (UploadedFile is a BytesIO), so the bytes are not copied in Python.
+    """
+
+    def __init__(self, uploaded_file, suffix: str):
+        self.uploaded_file = uploaded_file
+        self.suffix = suffix
+        self._path: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        if self._path is None:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=self.suffix) as tmp_file:
+                if hasattr(self.uploaded_file, "getbuffer"):
+                    with self.uploaded_file.getbuffer() as buf:
+                        tmp_file.write(buf)
+                else:
+                    self.uploaded_file.seek(0)
+                    shutil.copyfileobj(self.uploaded_file, tmp_file, length=1024 * 1024)
+                self._path = tmp_file.name
+        return self._path
+
+    def cleanup(self) -> None:
+        """Remove the temp file if one was written."""
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+
+# Session-state slot holding (file_id, content digest) for the current upload
+UPLOAD_DIGEST_STATE_KEY = "sr_upload_digest"
+
+
+def upload_digest(uploaded_file) -> str:
+    """Content hash of an upload, computed once per file_id so reruns don't rehash it."""
+    cached = st.session_state.get(UPLOAD_DIGEST_STATE_KEY)
+    if cached is not None and cached[0] == uploaded_file.file_id:
+        return cached[1]
+    with uploaded_file.getbuffer() as buf:
+        digest = hashlib.blake2b(buf, digest_size=16).hexdigest()
+    st.session_state[UPLOAD_DIGEST_STATE_KEY] = (uploaded_file.file_id, digest)
+    return digest
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_uploaded_file(digest: str, file_ext: str, _spool: UploadSpool):
+    """
+    Parse an upload once per distinct file contents and extension.
+
+    Streamlit reruns the script on every widget interaction; the cache is
+    keyed on the upload's content digest, so reruns and re-uploads of the
+    same capture skip parsing. The spool is not part of the key (leading
+    underscore) and is only written out on a cache miss. Parsers that
+    return rows are turned into a DataFrame here, so hits skip that too.
+    """
+    summary = process_file(None, _spool.path, file_ext)
+    if summary is None or isinstance(summary, pd.DataFrame):
+        return summary
+    return pd.DataFrame(summary)
+
+
+# Session-state slot holding (file_id, packets) for the current upload
+PACKETS_STATE_KEY = "sr_packets"
+
+
+def load_packets(uploaded_file, spool: UploadSpool) -> list:
+    """Dissect the capture once per upload; reruns reuse the packets kept in session state."""
+    cached = st.session_state.get(PACKETS_STATE_KEY)
+    if cached is not None and cached[0] == uploaded_file.file_id:
+        return cached[1]
+    packets = list(packet_stream(spool.path)())
+    # Replaces any previous upload's packets, so one list is held per session
+    st.session_state[PACKETS_STATE_KEY] = (uploaded_file.file_id, packets)
+    return packets
+
+
+def clear_packets() -> None:
+    """Drop the session's packet list and every cache that still references it."""
+    if st.session_state.pop(PACKETS_STATE_KEY, None) is None:
+        return
+    # The packet table module was imported when the packets were shown
+    from src.ui.display_packet_table import SUMMARY_CACHE_KEY
+    for key in (PACKET_STATS_STATE_KEY, SUMMARY_CACHE_KEY):
+        st.session_state.pop(key, None)
+
+
+# Session-state slot holding (packets, PacketSummary) for the AI tab
+PACKET_STATS_STATE_KEY = "sr_packet_stats"
+
+
+def packet_statistics(engine, packets: list):
+    """AI statistics for a packet list, computed once and reused while that list is shown."""
+    cached = st.session_state.get(PACKET_STATS_STATE_KEY)
+    if cached is not None and cached[0] is packets:
+        return cached[1]
+    summary = engine.extract_packet_statistics(packets)
+    st.session_state[PACKET_STATS_STATE_KEY] = (packets, summary)
+    return summary
 
 
 def main():
@@ -414,9 +617,8 @@ def main():
         initial_sidebar_state="collapsed",
     )
     
-    # Load and inject CSS
-    css = load_css()
-    st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+    # Inject CSS; style-only st.html skips the markdown renderer and takes no layout space
+    st.html(style_html())
     
     # Render header
     render_header()
@@ -426,6 +628,7 @@ def main():
     
     # Landing page or analysis
     if uploaded_file is None:
+        clear_packets()
         render_landing_page()
     else:
         # File size check
@@ -437,22 +640,28 @@ def main():
             """, unsafe_allow_html=True)
             return
         
+        # The uploader can only filter on the last suffix, so any .gz gets through it
+        file_ext = file_extension(uploaded_file.name)
+        if file_ext not in FILE_PARSERS:
+            st.markdown("""
+                <div class="sr-alert sr-alert-error">
+                    ❌ Unsupported file type. Compressed uploads must be gzip-compressed captures (.pcap.gz or .pcapng.gz).
+                </div>
+            """, unsafe_allow_html=True)
+            return
+        
         # Show file info
         render_file_info(uploaded_file)
         
-        # Save temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            tmp_file_path = tmp_file.name
-        
-        file_ext = uploaded_file.name.split(".")[-1].lower()
+        # Temp file, written on first use
+        spool = UploadSpool(uploaded_file, file_ext)
         
         try:
-            # Parse file
+            # Parse file (cached across reruns)
             with st.spinner("Processing file..."):
-                summary = process_file(uploaded_file, tmp_file_path, file_ext)
+                df = parse_uploaded_file(upload_digest(uploaded_file), file_ext, spool)
             
-            if summary is None:
+            if df is None:
                 st.markdown("""
                     <div class="sr-alert sr-alert-error">
                         ❌ Unsupported file type.
@@ -460,8 +669,6 @@ def main():
                 """, unsafe_allow_html=True)
                 return
             
-            # Convert to DataFrame
-            df = pd.DataFrame(summary)
             if df.empty:
                 st.markdown("""
                     <div class="sr-alert sr-alert-warning">
@@ -473,6 +680,17 @@ def main():
             # Render stats
             render_stats_cards(df)
             
+            # Dissect the capture once per upload; the packet table and the AI tab share the packets.
+            # CSV/TXT uploads have no packets to dissect.
+            packets_list, packets_error = None, None
+            if file_ext in CAPTURE_EXTENSIONS:
+                try:
+                    packets_list = load_packets(uploaded_file, spool)
+                except Exception as e:
+                    packets_error = e
+            else:
+                clear_packets()
+            
             # Main tabs with improved navigation
             tab1, tab2, tab3, tab4 = st.tabs([
                 "📊 Packet Analysis", 
@@ -491,40 +709,43 @@ def main():
                 """, unsafe_allow_html=True)
                 
                 from src.ui.display_packet_table import display_packet_table
-                import scapy.all as scapy
                 
-                try:
-                    packets = scapy.PcapReader(tmp_file_path)
-                    packets_list = list(packets)
-                    packets.close()
-                    display_packet_table(packets_list)
-                except Exception as e:
-                    st.error(f"Error reading packets: {e}")
+                if packets_error is not None:
+                    st.error(f"Error reading packets: {packets_error}")
+                elif packets_list is None:
+                    st.info("Packet details are only available for PCAP/PCAPNG captures.")
+                else:
+                    display_packet_table(packets_list, upload_digest(uploaded_file))
             
             with tab2:
                 st.markdown("""
                     <div class="sr-section-title">AI-Powered Analysis</div>
                 """, unsafe_allow_html=True)
                 
-                try:
-                    from src.ai.ai_query_interface import render_ai_query_interface, render_ai_quick_analysis
-                    import scapy.all as scapy
-                    
-                    packets = scapy.rdpcap(tmp_file_path)
-                    packets_list = list(packets)
-                    
-                    render_ai_quick_analysis(packets_list)
-                    render_ai_query_interface(packets_list)
-                except Exception as e:
-                    st.error(f"Error initializing AI: {e}")
+                if packets_error is None and packets_list is None:
+                    st.info("AI analysis is only available for PCAP/PCAPNG captures.")
+                else:
+                    try:
+                        if packets_error is not None:
+                            raise packets_error
+                        from src.ai.ai_query_interface import render_ai_query_interface, render_ai_quick_analysis
+                        from src.ai.ai_module import ai_engine
+                        
+                        # Statistics over the packets already loaded above, once per upload
+                        packet_summary = packet_statistics(ai_engine, packets_list)
+                        
+                        render_ai_quick_analysis(packets_list)
+                        render_ai_query_interface(packets_list, packet_summary, upload_digest(uploaded_file))
+                    except Exception as e:
+                        st.error(f"Error initializing AI: {e}")
             
             with tab3:
                 st.markdown("""
                     <div class="sr-section-title">Export Results</div>
                 """, unsafe_allow_html=True)
                 
-                # Save summary
-                save_summary(df.to_dict(orient="records"))
+                # Save summary (serialized once per upload)
+                json_data = export_summary(uploaded_file.file_id, df)
                 
                 st.markdown("""
                     <div class="sr-alert sr-alert-success">
@@ -535,9 +756,6 @@ def main():
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    with open("output/summary.json", "r") as f:
-                        json_data = f.read()
-                    
                     st.download_button(
                         label="📥 Download JSON",
                         data=json_data,
@@ -548,7 +766,7 @@ def main():
                 
                 with col2:
                     if st.button("👁️ View JSON", use_container_width=True):
-                        st.json(json.loads(json_data))
+                        st.json(json_data.decode())
                 
                 # Session export
                 st.markdown("---")
@@ -562,7 +780,7 @@ def main():
                             "ai_responses": st.session_state.get("ai_responses", []),
                             "user_query": st.session_state.get("user_query", ""),
                         }
-                        session_json = json.dumps(session_data, indent=4, cls=CustomJSONEncoder)
+                        session_json = summary_json(session_data)
                         
                         st.download_button(
                             label="💾 Export Session",
@@ -603,10 +821,7 @@ def main():
             """, unsafe_allow_html=True)
         
         finally:
-            try:
-                os.remove(tmp_file_path)
-            except Exception:
-                pass
+            spool.cleanup()
     
     # Footer
     render_footer()
@@ -6,11 +6,11 @@ from scapy.layers.inet import IP, TCP, UDP, ICMP
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 from typing import List, Optional
 from datetime import datetime
+from src.utils.helpers import packet_length
 
-def inject_modern_css():
-    """Inject modern CSS for beautiful packet viewer UI"""
-    st.markdown(
-        """
+# Packet viewer stylesheet, emitted on every rerun (Streamlit drops elements a
+# rerun does not re-emit); indentation and blank lines are stripped once here
+MODERN_CSS = "\n".join(line.strip() for line in """
         <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
         
@@ -194,9 +194,11 @@ def inject_modern_css():
             background: linear-gradient(180deg, #00b3b3, #00ffff);
         }
         </style>
-        """,
-        unsafe_allow_html=True
-    )
+""".splitlines() if line.strip())
+
+def inject_modern_css():
+    """Inject modern CSS for beautiful packet viewer UI"""
+    st.html(MODERN_CSS)
 
 def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
     """
@@ -206,7 +208,7 @@ def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
     rows = []
     for i, pkt in enumerate(packets, start=1):
         timestamp = getattr(pkt, "time", "N/A")
-        length = len(pkt)
+        length = packet_length(pkt)
 
         src_ip = "-"
         dst_ip = "-"
@@ -215,8 +217,8 @@ def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
         src_port: Optional[int] = None
         dst_port: Optional[int] = None
 
-        if IP in pkt:
-            ip_layer = pkt[IP]
+        ip_layer = pkt.getlayer(IP)
+        if ip_layer is not None:
             src_ip = ip_layer.src
             dst_ip = ip_layer.dst
             proto_num = ip_layer.proto
@@ -229,11 +231,14 @@ def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
             else:
                 protocol = str(proto_num)
         else:
-            protocol = pkt.lastlayer().name if pkt.lastlayer() else "-"
+            last_layer = pkt.lastlayer()
+            protocol = last_layer.name if last_layer else "-"
 
         # Info field: try to get meaningful info like HTTP GET or TCP flags
-        if protocol == "TCP" and TCP in pkt:
-            tcp_layer = pkt[TCP]
+        tcp_layer = pkt.getlayer(TCP) if protocol == "TCP" else None
+        udp_layer = pkt.getlayer(UDP) if protocol == "UDP" else None
+        icmp_layer = pkt.getlayer(ICMP) if protocol == "ICMP" else None
+        if tcp_layer is not None:
             flags = tcp_layer.sprintf("%flags%")
             info = flags if flags else ""
             src_port = int(tcp_layer.sport)
@@ -247,7 +252,7 @@ def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
                         info = raw_str.splitlines()[0]
                 except Exception:
                     pass
-        elif protocol == "UDP" and UDP in pkt:
+        elif udp_layer is not None:
             # Check for DNS
             if pkt.haslayer("DNS"):
                 dns_layer = pkt["DNS"]
@@ -257,11 +262,9 @@ def extract_packet_summary(packets: List[Packet]) -> pd.DataFrame:
                     info = "DNS Response"
             else:
                 info = "UDP Packet"
-            udp_layer = pkt[UDP]
             src_port = int(udp_layer.sport)
             dst_port = int(udp_layer.dport)
-        elif protocol == "ICMP" and ICMP in pkt:
-            icmp_layer = pkt[ICMP]
+        elif icmp_layer is not None:
             info = str(icmp_layer.type)
 
         # Format timestamp nicely
@@ -4,6 +4,31 @@ helpers.py
 Optional helper functions for Sniff Recon.
 """
 
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from struct import unpack_from
+
+# Seconds a process-pool job may run before the caller gives up and works in-process
+POOL_JOB_TIMEOUT = float(os.getenv("POOL_JOB_TIMEOUT", "120"))
+
+# IP protocol number -> name, built once rather than on every lookup
+PROTOCOL_NAMES = {
+    1: "ICMP",
+    6: "TCP",
+    17: "UDP",
+    2: "IGMP",
+    89: "OSPF",
+    # Add more protocol mappings as needed
+}
+
+# Ethernet header length and the IPv4 ethertype decoded from raw frame bytes
+ETH_HEADER_LEN = 14
+ETHERTYPE_IPV4 = 0x0800
+# IP protocol -> transport header bytes the raw decoders read (TCP, UDP, ICMP)
+TRANSPORT_HEADER_LEN = {6: 20, 17: 8, 1: 4}
+
 def get_protocol_name(proto_num):
     """
     Map protocol number to protocol name.
@@ -14,12 +39,115 @@ def get_protocol_name(proto_num):
     Returns:
         str: Protocol name or "UNKNOWN" if not found.
     """
-    protocol_map = {
-        1: "ICMP",
-        6: "TCP",
-        17: "UDP",
-        2: "IGMP",
-        89: "OSPF",
-        # Add more protocol mappings as needed
-    }
-    return protocol_map.get(proto_num, "UNKNOWN")
+    return PROTOCOL_NAMES.get(proto_num, "UNKNOWN")
+
+def ipv4_header(buf):
+    """
+    Decode the IPv4 header of an Ethernet frame without dissecting it.
+
+    Returns None whenever scapy could see the frame differently: not plain
+    IPv4, IP options cut short, or a first fragment whose TCP/UDP/ICMP
+    header is truncated by the capture or clipped by the IP total length.
+
+    Args:
+        buf (bytes): Captured frame bytes.
+
+    Returns:
+        tuple: (proto, src, dst, l4_offset, fragment) with src and dst as
+            4-byte address slices and fragment true for non-first fragments,
+            which carry no transport header; or None.
+    """
+    if len(buf) < ETH_HEADER_LEN + 20 or unpack_from("!H", buf, 12)[0] != ETHERTYPE_IPV4:
+        return None
+    version_ihl = buf[ETH_HEADER_LEN]
+    ihl = (version_ihl & 0x0F) * 4
+    if version_ihl >> 4 != 4 or ihl < 20 or len(buf) < ETH_HEADER_LEN + ihl:
+        return None
+    ip_len, frag, proto = unpack_from("!H2xHxB", buf, ETH_HEADER_LEN + 2)
+    offset = ETH_HEADER_LEN + ihl
+    fragment = frag & 0x1FFF != 0
+    if not fragment:
+        header_len = TRANSPORT_HEADER_LEN.get(proto)
+        # scapy cuts the IP payload at the total length; a clipped transport header is its call
+        if header_len is not None and (len(buf) < offset + header_len or ip_len < ihl + header_len):
+            return None
+    src = buf[ETH_HEADER_LEN + 12:ETH_HEADER_LEN + 16]
+    dst = buf[ETH_HEADER_LEN + 16:ETH_HEADER_LEN + 20]
+    return proto, src, dst, offset, fragment
+
+def packet_length(pkt):
+    """
+    Length of a packet in bytes without re-serializing it.
+
+    len(pkt) on a scapy packet rebuilds it from its fields; packets read
+    from a capture keep their captured bytes in pkt.original, so use those.
+
+    Args:
+        pkt (Packet): Scapy packet.
+
+    Returns:
+        int: Packet length in bytes.
+    """
+    original = getattr(pkt, "original", None)
+    return len(original) if original else len(pkt)
+
+def capture_key(packets):
+    """
+    Content digest of a capture: every packet's captured bytes and timestamp.
+
+    Hashing walks the whole capture, so callers that ask repeatedly should
+    keep the result (or pass the upload's digest) rather than recompute it.
+
+    Args:
+        packets (list): Parsed packets of the capture.
+
+    Returns:
+        str: Hex digest identifying the capture's contents.
+    """
+    digest = hashlib.blake2b(len(packets).to_bytes(8, "little"), digest_size=16)
+    for pkt in packets:
+        data = getattr(pkt, "original", None) or bytes(pkt)
+        digest.update(len(data).to_bytes(4, "little"))
+        digest.update(data)
+        digest.update(str(getattr(pkt, "time", 0)).encode())
+    return digest.hexdigest()
+
+def process_pool(workers):
+    """
+    Process pool that is safe to start from a threaded process.
+
+    The app runs Streamlit's server threads and the AI event-loop thread; a
+    forked worker can inherit a lock one of them held and deadlock, so workers
+    are started with forkserver where available and spawn otherwise.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The pool; shut it down without waiting on workers.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+def pool_map(func, jobs, workers, timeout=POOL_JOB_TIMEOUT):
+    """
+    Run func over jobs on a fresh process pool and return the results in order.
+
+    Args:
+        func (callable): Picklable worker entry point.
+        jobs (list): One argument per call.
+        workers (int): Number of worker processes.
+        timeout (float): Seconds allowed for the whole map.
+
+    Returns:
+        list: func(job) for each job.
+
+    Raises:
+        TimeoutError: If the results are not all in within timeout; stuck
+            workers are abandoned rather than waited on.
+    """
+    executor = process_pool(workers)
+    try:
+        return list(executor.map(func, jobs, timeout=timeout))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
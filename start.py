@@ -22,19 +22,22 @@ PORT = 8501
 URL = f"http://localhost:{PORT}"
 
 # Colors for terminal output (cross-platform)
+# Plain text when stdout is redirected (log files, CI, container logs)
+USE_COLOR = sys.stdout.isatty() and "NO_COLOR" not in os.environ
+
 class Colors:
-    if platform.system() == "Windows":
+    if USE_COLOR and platform.system() == "Windows":
         # Enable ANSI on Windows
         os.system("")
     
-    HEADER = "\033[95m"
-    BLUE = "\033[94m"
-    CYAN = "\033[96m"
-    GREEN = "\033[92m"
-    YELLOW = "\033[93m"
-    RED = "\033[91m"
-    ENDC = "\033[0m"
-    BOLD = "\033[1m"
+    HEADER = "\033[95m" if USE_COLOR else ""
+    BLUE = "\033[94m" if USE_COLOR else ""
+    CYAN = "\033[96m" if USE_COLOR else ""
+    GREEN = "\033[92m" if USE_COLOR else ""
+    YELLOW = "\033[93m" if USE_COLOR else ""
+    RED = "\033[91m" if USE_COLOR else ""
+    ENDC = "\033[0m" if USE_COLOR else ""
+    BOLD = "\033[1m" if USE_COLOR else ""
 
 
 def print_banner():
@@ -12,6 +12,147 @@ def test_packet_summary_class():
     """Test PacketSummary dataclass"""
     assert hasattr(ai_module, 'PacketSummary')
 
+def test_extract_statistics_accepts_generator():
+    """Test that packet statistics are computed in one pass over any iterable"""
+    from scapy.layers.inet import IP, TCP
+    packets = (IP(src="10.0.0.1", dst="10.0.0.2") / TCP(dport=80) for _ in range(3))
+    summary = ai_module.ai_engine.extract_packet_statistics(packets)
+    assert summary.total_packets == 3
+    assert summary.top_src_ips == {"10.0.0.1": 3}
+
+def test_split_batch_response():
+    """Test that batched answers split per chunk and malformed ones are rejected"""
+    from src.ai.multi_agent_ai import MultiAgentAI
+    text = 'Here you go:\n```json\n["first chunk", "second chunk"]\n```'
+    assert MultiAgentAI._split_batch_response(text, 2) == ["first chunk", "second chunk"]
+    assert MultiAgentAI._split_batch_response(text, 3) is None
+    assert MultiAgentAI._split_batch_response("no array here", 2) is None
+
+def test_failing_provider_stops_being_picked_first():
+    """Test that a provider that keeps failing is not tried first on every chunk"""
+    import asyncio
+    from src.ai.multi_agent_ai import AIProvider, AIResponse, MultiAgentAI
+    
+    class FakeProvider(AIProvider):
+        def __init__(self, name, ok):
+            self._name, self.ok, self.calls = name, ok, 0
+        @property
+        def name(self):
+            return self._name
+        @property
+        def max_tokens(self):
+            return 4096
+        async def test_connection(self):
+            return True
+        async def query(self, prompt, context=None):
+            self.calls += 1
+            if self.ok:
+                return AIResponse(success=True, response="ok", provider=self.name, response_time=1.0)
+            return AIResponse(success=False, response="", error="HTTP 429: rate limited", provider=self.name)
+    
+    agent = MultiAgentAI()
+    agent.use_weighted_balancing = False
+    bad, good = FakeProvider("Bad", False), FakeProvider("Good", True)
+    agent.active_providers = [bad, good]
+    for i in range(5):
+        response = asyncio.run(agent._query_with_failover("prompt", "context", f"c{i}"))
+        assert response.success and response.provider == "Good"
+    assert bad.calls == 1
+    assert good.calls == 5
+
+def test_cached_response_spends_no_tokens():
+    """Test that a cache hit is not counted again in the token and time totals"""
+    from src.ai.multi_agent_ai import AIResponse, MultiAgentAI
+    agent = MultiAgentAI()
+    agent._cache_response("key", AIResponse(success=True, response="ok", tokens_used=120,
+                                            response_time=2.0, chunk_id="c00000"))
+    cached = agent._cached_response("key", "c00001")
+    assert cached.response == "ok" and cached.chunk_id == "c00001"
+    assert cached.tokens_used is None and cached.response_time == 0.0
+
+def test_range_statistics_match_sliced_statistics():
+    """Test that statistics walked by index match those of a copied slice"""
+    import numpy as np
+    from scapy.layers.inet import IP, TCP, UDP
+    from src.ai.multi_agent_ai import MultiAgentAI
+    from src.utils.helpers import packet_length
+    packets = [IP(src=f"10.0.0.{i}") / (TCP(dport=80) if i % 2 else UDP(dport=53)) for i in range(6)]
+    sizes = np.array([packet_length(pkt) for pkt in packets], dtype=np.int64)
+    agent = MultiAgentAI()
+    assert MultiAgentAI._range_statistics(packets, sizes, 1, 5) == agent._extract_chunk_statistics(packets[1:5], sizes[1:5])
+    assert MultiAgentAI._range_statistics(packets, sizes, 3, 3) == {}
+
+def test_query_reports_each_chunk_as_it_arrives():
+    """Test that query hands every chunk's response to on_response before returning them in order"""
+    import asyncio
+    from scapy.layers.inet import IP, UDP
+    from src.ai.multi_agent_ai import AIProvider, AIResponse, MultiAgentAI
+    
+    class EchoProvider(AIProvider):
+        @property
+        def name(self):
+            return "Echo"
+        @property
+        def max_tokens(self):
+            return 4096
+        async def test_connection(self):
+            return True
+        async def query(self, prompt, context=None):
+            return AIResponse(success=True, response="ok", provider=self.name, response_time=0.1)
+    
+    agent = MultiAgentAI()
+    agent.use_weighted_balancing = False
+    agent.active_providers = [EchoProvider()]
+    agent.max_packets_per_chunk = 1
+    packets = [IP(src=f"10.0.0.{i}") / UDP(dport=53) for i in range(4)]
+    
+    arrived = []
+    responses = asyncio.run(agent.query("prompt", packets, arrived.append))
+    assert len(arrived) == len(responses) == 4
+    assert sorted(r.chunk_id for r in arrived) == [r.chunk_id for r in responses]
+
+def test_capture_key_covers_every_packet():
+    """Test that captures differing only in a middle packet get different cache keys"""
+    from scapy.layers.inet import IP, UDP
+    from src.utils.helpers import capture_key
+    first = [IP(src="10.0.0.1") / UDP(dport=53) for _ in range(3)]
+    second = [first[0], IP(src="10.0.0.9") / UDP(dport=53), first[2]]
+    assert capture_key(first) != capture_key(second)
+    assert capture_key(first) == capture_key(list(first))
+
+def test_failed_pool_job_does_not_abort_other_chunks(monkeypatch):
+    """Test that one failing pool job falls back in-process without losing any chunk"""
+    import asyncio
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from scapy.layers.inet import IP, UDP
+    from src.ai import multi_agent_ai
+    
+    calls = []
+    def flaky_statistics(job):
+        calls.append(job)
+        time.sleep(0.01)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return {"from_pool": True}
+    
+    # One worker so the other chunks' jobs are still queued when the second one fails
+    monkeypatch.setattr(multi_agent_ai, "PARALLEL_STATS_MIN_PACKETS", 1)
+    monkeypatch.setattr(multi_agent_ai, "process_pool", lambda workers: ThreadPoolExecutor(1))
+    monkeypatch.setattr(multi_agent_ai, "chunk_statistics_from_frames", flaky_statistics)
+    monkeypatch.setattr(multi_agent_ai.os, "cpu_count", lambda: 4)
+    
+    agent = multi_agent_ai.MultiAgentAI()
+    agent.max_packets_per_chunk = 1
+    packets = [IP(src=f"10.0.0.{i}") / UDP(dport=53) for i in range(12)]
+    
+    async def collect():
+        return [chunk async for chunk in agent.iter_chunks(packets)]
+    
+    chunks = asyncio.run(collect())
+    assert [chunk.start for chunk in chunks] == list(range(12))
+    assert all(chunk.summary for chunk in chunks)
+
 # TODO: Add comprehensive AI module tests
 # - Test AI query with mock responses
 # - Test packet filtering logic
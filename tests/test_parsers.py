@@ -16,4 +16,46 @@ def test_txt_parser_exists():
     """Test that TXT parser module exists"""
     assert hasattr(txt_parser, 'parse_txt')
 
+def test_parse_pcap_matches_streamed_rows(tmp_path):
+    """Test that the vectorized pcap decoder agrees with the streaming reader"""
+    import pandas as pd
+    from scapy.all import wrpcap
+    from scapy.layers.l2 import Ether, ARP, Dot1Q
+    from scapy.layers.inet import IP, TCP, UDP, ICMP
+    path = str(tmp_path / "sample.pcap")
+    wrpcap(path, [
+        Ether() / IP(src="10.0.0.1", dst="10.0.0.2") / TCP(sport=1234, dport=80),
+        Ether() / Dot1Q(vlan=5) / IP() / UDP(sport=53, dport=53),
+        Ether() / ARP(),
+        Ether() / IP(frag=10, proto=6) / (b"x" * 30),
+        Ether() / IP() / ICMP(),
+    ])
+    df = pcap_parser.parse_pcap(path)
+    assert list(df.columns) == list(pcap_parser.PCAP_COLUMNS)
+    streamed = pd.DataFrame(list(pcap_parser.iter_pcap_rows(path)), columns=list(pcap_parser.PCAP_COLUMNS))
+    assert df.equals(streamed)
+    assert df['Protocol'].tolist() == ['TCP', 'UDP', 'TCP', 'ICMP']
+
+def test_csv_upload_column_aliases(tmp_path):
+    """Test that CSV uploads map alias headers and fall back past falsy values"""
+    from src.ui.gui import _parse_csv_rows
+    path = tmp_path / "sample.csv"
+    path.write_text("Source IP,dst_ip,packet_size,size\n10.0.0.1,10.0.0.2,0,60\n10.0.0.4,10.0.0.3,70,80\n")
+    df = _parse_csv_rows(str(path))
+    assert list(df.columns) == ["src_ip", "dst_ip", "protocol", "packet_size"]
+    assert df["src_ip"].tolist() == ["10.0.0.1", "10.0.0.4"]
+    assert df["dst_ip"].tolist() == ["10.0.0.2", "10.0.0.3"]
+    assert df["protocol"].isna().all()
+    assert df["packet_size"].tolist() == [60, 70]
+
+def test_export_converts_edecimal_timestamps():
+    """Test that EDecimal timestamps are exported as floats and missing ones stay null"""
+    import pandas as pd
+    from scapy.utils import EDecimal
+    from src.ui.gui import decimals_to_float
+    df = pd.DataFrame({"Timestamp": [EDecimal("1.5"), None], "Protocol": ["TCP", "UDP"]})
+    records = decimals_to_float(df).to_dict(orient="records")
+    assert records == [{"Timestamp": 1.5, "Protocol": "TCP"}, {"Timestamp": None, "Protocol": "UDP"}]
+    assert type(records[0]["Timestamp"]) is float
+
 # TODO: Add comprehensive parser tests with sample files